@@ -0,0 +1,306 @@
+'''
+Copyright (c) 2024 by Albresky, All Rights Reserved.
+
+Author: Albresky albre02@outlook.com
+Date: 2026-10-19 13:54:46
+LastEditTime: 2026-10-19 14:53:12
+FilePath: /EDA-assignments/lab1.1/experi_fir/src/fir_model.py
+
+Description: Bit-accurate streaming golden model of fir.cpp, checks the testbench vectors
+             and the hardware result hpf_hw.wav chunk by chunk.
+'''
+
+import os
+import re
+import time
+import wave
+import argparse
+import numpy as np
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+JUPYTER = os.path.join(HERE, '../jupyter')
+CHUNK = 1 << 16
+
+# C type -> (bits, signed)
+C_TYPES = {
+    'char': (8, True), 'signed char': (8, True), 'unsigned char': (8, False),
+    'short': (16, True), 'unsigned short': (16, False),
+    'int': (32, True), 'unsigned': (32, False), 'unsigned int': (32, False),
+    'long long': (64, True), 'unsigned long long': (64, False),
+}
+
+
+def parse_header(filename:str) -> tuple:
+    """Parse the tap count and the fixed-point types of fir.h.
+
+    Args:
+        filename (str): The path of fir.h.
+
+    Returns:
+        tuple: N and a dict type name -> (bits, signed), for data_t, coef_t and acc_t.
+    """
+    with open(filename, 'r') as f:
+        text = f.read()
+    taps = int(re.search(r'#define\s+N\s+(\d+)', text).group(1))
+    types = {}
+    for ctype, name in re.findall(r'typedef\s+([\w\s<>,]+?)\s+(\w+)\s*;', text):
+        ctype = ' '.join(ctype.split())
+        ap = re.fullmatch(r'ap_(u?)int<(\d+)>', ctype)
+        if ap:
+            types[name] = (int(ap.group(2)), ap.group(1) == '')
+        elif ctype in C_TYPES:
+            types[name] = C_TYPES[ctype]
+        else:
+            raise ValueError(f'Unsupported type {ctype} of {name}')
+    return taps, types
+
+
+def parse_testbench(filename:str) -> dict:
+    """Parse the initialized arrays of fir_tb.cpp, e.g. `impulse`, `coefficient` and
+    `ground_truth`.
+
+    Args:
+        filename (str): The path of fir_tb.cpp.
+
+    Returns:
+        dict: Array name -> int64 array.
+    """
+    with open(filename, 'r') as f:
+        text = f.read()
+    arrays = {}
+    for name, body in re.findall(r'\w+\s+(\w+)\s*\[\s*\w+\s*\]\s*=\s*\{([^}]*)\}', text):
+        arrays[name] = np.array([int(v) for v in body.replace('\n', ' ').split(',') if v.strip()], dtype=np.int64)
+    return arrays
+
+
+def wrap(values:np.ndarray, bits:int, signed:bool = True) -> np.ndarray:
+    """Two's complement wrap-around of int64 values to the given width, like an assignment
+    to a narrower C type.
+    """
+    if bits >= 64:
+        return values
+    mask = (1 << bits) - 1
+    values = values & mask
+    if signed:
+        values = np.where(values >= 1 << (bits - 1), values - (1 << bits), values)
+    return values
+
+
+def _wrap_int(value:int, bits:int, signed:bool = True) -> int:
+    value &= (1 << bits) - 1
+    return value - (1 << bits) if signed and value >= 1 << (bits - 1) else value
+
+
+class FirModel:
+    """Streaming model of `fir()`: y[n] = sum(c[k] * x[n - k]) accumulated in acc_t and
+    stored to data_t. The shift register survives across chunks, so feeding a signal in
+    any chunking gives the same output as one call over the whole signal.
+    """
+    def __init__(self, coefs, types:dict) -> None:
+        """The constructor of the FIR model.
+
+        Args:
+            coefs (array-like): The N coefficients, c[0] first.
+            types (dict): The (bits, signed) of data_t, coef_t and acc_t.
+        """
+        self.data = types['data_t']
+        self.coef = types['coef_t']
+        self.acc = types['acc_t']
+        self.coefs = wrap(np.asarray(coefs, dtype=np.int64), *self.coef)
+        self.taps = len(self.coefs)
+        self.state = np.zeros(self.taps - 1, dtype=np.int64)
+
+        # The sum of the products is only needed modulo 2^acc_bits. When it could overflow
+        # int64 the coefficients are split into 16-bit halves, each convolved on its own.
+        bound = self.data[0] + self.coef[0] + int(np.ceil(np.log2(self.taps))) + 1
+        if bound < 63:
+            self.parts = [(self.coefs, 0)]
+        else:
+            low = self.coefs & 0xFFFF
+            self.parts = [(low, 0), ((self.coefs - low) >> 16, 16)]
+
+    def reset(self) -> None:
+        self.state[:] = 0
+
+    def process(self, x:np.ndarray) -> np.ndarray:
+        """Filter one chunk with one convolution per coefficient part.
+
+        Args:
+            x (ndarray): The input samples of the chunk.
+
+        Returns:
+            ndarray: The data_t outputs, int64.
+        """
+        x = wrap(np.asarray(x, dtype=np.int64), *self.data)
+        ext = np.concatenate((self.state, x))
+        acc = np.zeros(len(x), dtype=np.int64)
+        for coefs, shift in self.parts:
+            part = wrap(np.convolve(ext, coefs, mode='valid'), self.acc[0], True)
+            acc = wrap(acc + (part << shift), self.acc[0], True)
+        if self.taps > 1:
+            self.state = ext[len(ext) - (self.taps - 1):].copy()
+        return wrap(wrap(acc, *self.acc), *self.data)
+
+
+def fir_per_sample(x, coefs, types:dict) -> np.ndarray:
+    """Direct translation of the `fir()` loop, one sample at a time, as a slow reference.
+    """
+    data, acc_t = types['data_t'], types['acc_t']
+    coefs = [int(c) for c in coefs]
+    shift_reg = [0] * len(coefs)
+    out = []
+    for v in x:
+        v = int(v)
+        acc = 0
+        for i in range(len(coefs) - 1, -1, -1):
+            if i == 0:
+                acc += v * coefs[0]
+                shift_reg[0] = v
+            else:
+                shift_reg[i] = shift_reg[i - 1]
+                acc += shift_reg[i] * coefs[i]
+        out.append(_wrap_int(_wrap_int(acc, *acc_t), *data))
+    return np.array(out, dtype=np.int64)
+
+
+def iter_wav(filename:str, chunk:int = CHUNK):
+    """Yield the samples of a mono PCM WAV file chunk by chunk.
+
+    Args:
+        filename (str): The path of the WAV file.
+        chunk (int, optional): Samples per chunk. Defaults to 65536.
+    """
+    with wave.open(filename, 'rb') as w:
+        if w.getnchannels() != 1:
+            raise ValueError(f'{filename} has {w.getnchannels()} channels, expected mono')
+        dtype = {1: np.uint8, 2: '<i2', 4: '<i4'}[w.getsampwidth()]
+        while True:
+            frames = w.readframes(chunk)
+            if not frames:
+                return
+            samples = np.frombuffer(frames, dtype=dtype).astype(np.int64)
+            yield samples - 128 if w.getsampwidth() == 1 else samples
+
+
+def to_pcm16(y:np.ndarray, peak:int) -> np.ndarray:
+    """Normalize the filter outputs to 16-bit PCM the way hpf_hw.wav was written: scale by
+    the peak magnitude of the whole recording to 2^15, minus one, truncated toward zero.
+    """
+    if peak == 0:
+        return np.full(len(y), -1, dtype=np.int64)
+    return wrap(np.trunc(y / peak * 32768.0 - 1).astype(np.int64), 16)
+
+
+def filter_wav(model:FirModel, filename:str, chunk:int = CHUNK):
+    """Yield the filter outputs of a WAV file chunk by chunk, from a reset model."""
+    model.reset()
+    for x in iter_wav(filename, chunk):
+        yield model.process(x)
+
+
+def compare_wav(model:FirModel, input_wav:str, reference_wav:str, chunk:int = CHUNK, limit:int = 10) -> dict:
+    """Compare the model against a hardware result in two streaming passes: the first
+    finds the peak used for the normalization, the second compares sample by sample.
+
+    Args:
+        model (FirModel): The FIR model.
+        input_wav (str): The input recording, e.g. birds.wav.
+        reference_wav (str): The hardware result, e.g. hpf_hw.wav.
+        chunk (int, optional): Samples per chunk. Defaults to 65536.
+        limit (int, optional): Max number of mismatches listed. Defaults to 10.
+
+    Returns:
+        dict: Sample count, mismatch count, max difference, the first mismatches as
+        (index, model, hardware) and the peak.
+    """
+    peak = 0
+    for y in filter_wav(model, input_wav, chunk):
+        if len(y):
+            peak = max(peak, int(np.abs(y).max()))
+
+    stats = {'samples': 0, 'mismatches': 0, 'max_diff': 0, 'first': [], 'peak': peak}
+    reference = iter_wav(reference_wav, chunk)
+    pending = np.zeros(0, dtype=np.int64)
+    for y in filter_wav(model, input_wav, chunk):
+        expected = to_pcm16(y, peak)
+        while len(pending) < len(expected):
+            more = next(reference, None)
+            if more is None:
+                break
+            pending = np.concatenate((pending, more))
+        m = min(len(expected), len(pending))
+        ref, pending = pending[:m], pending[m:]
+        diff = np.flatnonzero(expected[:m] != ref)
+        if len(diff):
+            stats['max_diff'] = max(stats['max_diff'], int(np.abs(expected[diff] - ref[diff]).max()))
+            for k in diff[:limit - len(stats['first'])].tolist():
+                stats['first'].append((stats['samples'] + k, int(expected[k]), int(ref[k])))
+        stats['mismatches'] += len(diff) + len(expected) - m
+        stats['samples'] += len(expected)
+    stats['extra_reference'] = len(pending) + sum(len(r) for r in reference)
+    return stats
+
+
+def write_wav(model:FirModel, input_wav:str, output_wav:str, chunk:int = CHUNK) -> None:
+    """Write the normalized 16-bit output of the model, also in two streaming passes."""
+    peak = 0
+    for y in filter_wav(model, input_wav, chunk):
+        if len(y):
+            peak = max(peak, int(np.abs(y).max()))
+    with wave.open(input_wav, 'rb') as w:
+        rate = w.getframerate()
+    with wave.open(output_wav, 'wb') as out:
+        out.setnchannels(1)
+        out.setsampwidth(2)
+        out.setframerate(rate)
+        for y in filter_wav(model, input_wav, chunk):
+            out.writeframes(to_pcm16(y, peak).astype('<i2').tobytes())
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Golden model of fir.cpp')
+    parser.add_argument('--header', default=os.path.join(HERE, 'fir.h'), help='fir.h, for N and the types')
+    parser.add_argument('--tb', default=os.path.join(HERE, 'fir_tb.cpp'), help='fir_tb.cpp, for the coefficients and the impulse test')
+    parser.add_argument('--input', default=os.path.join(JUPYTER, 'birds.wav'), help='The input recording')
+    parser.add_argument('--reference', default=os.path.join(JUPYTER, 'hpf_hw.wav'), help='The hardware result to compare against')
+    parser.add_argument('--output', default=None, help='Write the model output to this WAV file')
+    parser.add_argument('--chunk', type=int, default=CHUNK, help='Samples per chunk')
+    parser.add_argument('--check-prefix', type=int, default=2000, help='Samples checked against the per-sample loop')
+    args = parser.parse_args()
+
+    taps, types = parse_header(args.header)
+    vectors = parse_testbench(args.tb)
+    model = FirModel(vectors['coefficient'][:taps], types)
+
+    # Testbench vectors
+    y = model.process(vectors['impulse'])
+    print(f"Testbench: {'passed' if np.array_equal(y, vectors['ground_truth']) else 'failed'}")
+
+    # Chunked model against the per-sample loop on a prefix
+    if args.check_prefix > 0:
+        x = next(iter_wav(args.input, args.check_prefix), np.zeros(0, dtype=np.int64))
+        start_time = time.time()
+        slow = fir_per_sample(x, model.coefs, types)
+        slow_time = time.time() - start_time
+        model.reset()
+        start_time = time.time()
+        fast = np.concatenate([model.process(x[i:i + 97]) for i in range(0, len(x), 97)])
+        fast_time = time.time() - start_time
+        print(f"Per-sample check: {'passed' if np.array_equal(slow, fast) else 'failed'} on {len(x)} samples "
+              f"({slow_time / len(x) * 1e6:.1f}us/sample per-sample, {fast_time / len(x) * 1e6:.2f}us/sample chunked)")
+
+    # Whole recording against the hardware result
+    start_time = time.time()
+    stats = compare_wav(model, args.input, args.reference, args.chunk)
+    runtime = time.time() - start_time
+    print(f"Reference: samples={stats['samples']} mismatches={stats['mismatches']} max_diff={stats['max_diff']} "
+          f"extra_reference={stats['extra_reference']} peak={stats['peak']} RunTime={runtime:.3f}s")
+    for index, expected, actual in stats['first']:
+        print(f'  Sample {index}: model {expected}, hardware {actual}')
+
+    if args.output:
+        write_wav(model, args.input, args.output, args.chunk)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,338 @@
+'''
+Copyright (c) 2024 by Albresky, All Rights Reserved.
+
+Author: Albresky albre02@outlook.com
+Date: 2026-10-19 13:56:54
+LastEditTime: 2026-10-19 14:25:06
+FilePath: /EDA-assignments/lab1.1/experi_mm/src/mm_model.py
+
+Description: Tiled golden model of matmult.c with the `short` overflow semantics of
+             tb_matmult.c, and an analytical latency/resource estimator of its HLS variants.
+'''
+
+import os
+import re
+import time
+import math
+import argparse
+import itertools
+import numpy as np
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+SHRT_MAX = (1 << 15) - 1
+
+# float64 sums of int16 x int16 products stay exact up to 2^53 / 2^30 terms
+MAX_EXACT_K = 1 << 23
+
+
+def wrap16(values:np.ndarray) -> np.ndarray:
+    """Two's complement wrap-around to short, like `short s = (int)v;` with gcc."""
+    return ((np.asarray(values, dtype=np.int64) + (1 << 15)) & 0xFFFF) - (1 << 15)
+
+
+def parse_testbench(filename:str) -> dict:
+    """Parse the initialized 2D arrays of tb_matmult.c, i.e. `A` and `B`.
+
+    Args:
+        filename (str): The path of tb_matmult.c.
+
+    Returns:
+        dict: Array name -> int64 matrix.
+    """
+    with open(filename, 'r') as f:
+        text = f.read()
+    arrays = {}
+    for name, body in re.findall(r'short\s+(\w+)\s*\[\s*\w+\s*\]\s*\[\s*\w+\s*\]\s*=\s*\{(.*?)\}\s*;', text, re.S):
+        rows = re.findall(r'\{([^{}]*)\}', body)
+        arrays[name] = np.array([[int(v) for v in row.split(',') if v.strip()] for row in rows], dtype=np.int64)
+    return arrays
+
+
+def matmult_golden(A:np.ndarray, B:np.ndarray, tile:int = 512) -> np.ndarray:
+    """The golden result of tb_matmult.c: `golden_C[m][n] += A[m][k] * B[k][n]` converts
+    the int sum back to short on every step, which equals one wrap of the exact sum
+    modulo 2^16. The product is computed in tiles with float64 BLAS, exact because
+    every k-tile is far below 2^23 terms, and wrapped after each k-tile, so memory stays
+    at a few tiles and the intermediate sums never overflow.
+
+    Args:
+        A (ndarray): The N x N short matrix A.
+        B (ndarray): The N x N short matrix B.
+        tile (int, optional): The tile size. Defaults to 512.
+
+    Returns:
+        ndarray: The N x N short result, int64.
+    """
+    A, B = wrap16(A), wrap16(B)
+    n, kk, m = A.shape[0], A.shape[1], B.shape[1]
+    tile = min(tile, MAX_EXACT_K)
+    C = np.zeros((n, m), dtype=np.int64)
+    for i in range(0, n, tile):
+        for j in range(0, m, tile):
+            acc = np.zeros((min(tile, n - i), min(tile, m - j)), dtype=np.int64)
+            for k in range(0, kk, tile):
+                a = A[i:i + tile, k:k + tile].astype(np.float64)
+                b = B[k:k + tile, j:j + tile].astype(np.float64)
+                acc = wrap16(acc + (a @ b).astype(np.int64))
+            C[i:i + tile, j:j + tile] = acc
+    return C
+
+
+def matmult_blocked(A:np.ndarray, B:np.ndarray, blocks:int = 4, tile:int = 512) -> np.ndarray:
+    """Model of the dataflow variant: `blockMM` computes the partial product of one k-block
+    into a short `tempC`, and `blockMerge` adds the partials pairwise, each sum stored back
+    to short.
+
+    Args:
+        A (ndarray): The N x N short matrix A.
+        B (ndarray): The N x N short matrix B.
+        blocks (int, optional): BLOCK_DIM_B, the number of k-blocks. Defaults to 4.
+        tile (int, optional): The tile size of the partial products. Defaults to 512.
+
+    Returns:
+        ndarray: The N x N short result, int64.
+    """
+    n = A.shape[1]
+    if n % blocks:
+        raise ValueError(f'N={n} is not a multiple of {blocks} blocks')
+    size = n // blocks
+    partials = [matmult_golden(A[:, b * size:(b + 1) * size], B[b * size:(b + 1) * size, :], tile) for b in range(blocks)]
+    while len(partials) > 1:
+        partials = [wrap16(partials[k] + partials[k + 1]) if k + 1 < len(partials) else partials[k]
+                    for k in range(0, len(partials), 2)]
+    return partials[0]
+
+
+def matmult_per_step(A:np.ndarray, B:np.ndarray) -> np.ndarray:
+    """Direct translation of the testbench loop, one short conversion per step."""
+    n, kk, m = len(A), len(B), len(B[0])
+    C = np.zeros((n, m), dtype=np.int64)
+    for i in range(n):
+        for j in range(m):
+            s = 0
+            for k in range(kk):
+                s = int(wrap16(s + int(A[i][k]) * int(B[k][j])))
+            C[i][j] = s
+    return C
+
+
+######## Analytical latency / resource model ########
+
+# Operation latencies in cycles at the 13ns clock of run.tcl, calibrated on the csynth
+# reports of the original (2057 cycles, interval 2058) and the partitioned (260 cycles,
+# interval 256) kernels at N=16
+READ_LATENCY = 1      # BRAM / memory port read
+MUL_LATENCY = 1       # 16x16 multiply on a DSP48
+ADDS_PER_CYCLE = 3    # chained 16-bit adds per cycle
+STORE_LATENCY = 1
+MEM_PORTS = 2         # true dual port memories
+AUTO_UNROLL_TRIP = 16 # inner loops up to this trip count are unrolled when the parent is pipelined
+BRAM_BITS = 18432
+DATAFLOW_OVERHEAD = 2 # handshake cycles per dataflow region
+
+
+class Variant:
+    """One pragma configuration of the matmult kernel.
+    """
+    def __init__(self, name:str, unroll:int = 1, partition:str = 'none', blocks:int = 1) -> None:
+        """The constructor of a variant.
+
+        Args:
+            name (str): The variant name.
+            unroll (int, optional): Unroll factor of the k loop. Defaults to 1.
+            partition (str, optional): 'none', 'complete' or 'block' partitioning of A and B,
+                'block' partitions them by k-block. Defaults to 'none'.
+            blocks (int, optional): Number of k-blocks computed by parallel dataflow tasks and
+                merged by a tree of pipelined adds, 1 for no dataflow. Defaults to 1.
+        """
+        self.name = name
+        self.unroll = unroll
+        self.partition = partition
+        self.blocks = blocks
+
+    def __repr__(self) -> str:
+        return f'Variant({self.name}, unroll={self.unroll}, partition={self.partition}, blocks={self.blocks})'
+
+
+# The variants kept in matmult.c
+VARIANTS = [
+    Variant('original'),
+    Variant('unroll', unroll=16),
+    Variant('partition', unroll=16, partition='complete'),
+    Variant('dataflow', unroll=4, partition='block', blocks=4),
+]
+
+
+def _tree_cycles(width:int) -> int:
+    return max(1, math.ceil((math.ceil(math.log2(width)) + 1) / ADDS_PER_CYCLE)) if width > 1 else 1
+
+
+def _pipeline_depth(ii:int, width:int, memory:bool) -> int:
+    """Depth of one pipelined iteration that reads `width` products and adds them up. With
+    memory operands the multiplies and the adder tree overlap the reads spread over II
+    cycles, only the last read and the final add stay on the critical path.
+    """
+    if memory and ii > 1:
+        return (ii - 1) + READ_LATENCY + STORE_LATENCY
+    return (READ_LATENCY if memory else 0) + MUL_LATENCY + _tree_cycles(width) + STORE_LATENCY
+
+
+def estimate(variant:Variant, n:int) -> dict:
+    """Estimate the latency and the resources of a variant, the way Vitis HLS schedules it:
+    the innermost loop left after unrolling is pipelined, or the (i, j) loops when the k
+    loop is fully unrolled.
+
+    Args:
+        variant (Variant): The pragma configuration.
+        n (int): The matrix size N.
+
+    Returns:
+        dict: Latency and interval in cycles, II, DSP and BRAM_18K counts, and the number
+        of parallel memory ports the schedule assumes.
+    """
+    if n % variant.blocks:
+        raise ValueError(f'N={n} is not a multiple of {variant.blocks} blocks')
+    trip = n // variant.blocks
+    unroll = min(variant.unroll, trip)
+    iters = math.ceil(trip / unroll)
+    if iters <= AUTO_UNROLL_TRIP:
+        # the k loop disappears, one pipelined iteration per (i, j)
+        width, iters = trip, 1
+    else:
+        width = unroll
+
+    memory = variant.partition != 'complete'
+    # 'none' and 'block' both leave `width` reads on one dual port bank per task
+    ii = math.ceil(width / MEM_PORTS) if memory else 1
+    depth = _pipeline_depth(ii, width, memory)
+    if iters == 1:
+        task = n * n * ii + depth
+    else:
+        k_loop = (iters - 1) * ii + depth
+        task = n * n * (k_loop + 2) + 1
+
+    latency = task
+    merges = 0
+    if variant.blocks > 1:
+        merge = n * n + READ_LATENCY + 1 + STORE_LATENCY
+        merges = math.ceil(math.log2(variant.blocks))
+        latency = task + merges * merge + (merges + 1) * DATAFLOW_OVERHEAD
+
+    if iters == 1 and not memory and variant.blocks == 1:
+        # the kernel is one flattened pipelined loop over registers, which auto-rewinds:
+        # the next call overlaps the drain of the last iterations (partition, 256 cycles)
+        interval = n * n * ii
+    else:
+        # not pipelined at the top, the next call waits for this one and the ap_start
+        # handshake (original, 2058 cycles); the dataflow variant calls its wrappers and
+        # the last merge one after another, so it falls here as well
+        interval = latency + 1
+
+    mults = math.ceil(width / ii) * variant.blocks
+    bram = 0
+    if variant.blocks > 1:
+        # tempC: one short N x N array per partial and per merge output, except the last
+        temp = variant.blocks + 2 ** merges - 2
+        bram = temp * math.ceil(n * n * 16 / BRAM_BITS)
+    ports = 3 * n * n if variant.partition == 'complete' else (variant.blocks if variant.partition == 'block' else 1) * MEM_PORTS * 2 + 1
+    return {
+        'variant': variant.name,
+        'n': n,
+        'unroll': variant.unroll,
+        'partition': variant.partition,
+        'blocks': variant.blocks,
+        'ii': ii,
+        'latency': latency,
+        'interval': interval,
+        'dsp': mults,
+        'bram': bram,
+        'ports': ports,
+    }
+
+
+def sweep(sizes:list, unrolls:list = None, partitions:list = None, blocks:list = None) -> list:
+    """Estimate every combination of matrix size, unroll factor, partitioning and number of
+    dataflow blocks (tile count along k).
+
+    Returns:
+        list: The estimates, sorted by latency and DSP count.
+    """
+    unrolls = unrolls or [1, 2, 4, 8, 16, 32]
+    partitions = partitions or ['none', 'complete', 'block']
+    blocks = blocks or [1, 2, 4, 8]
+    results = []
+    for n, u, p, b in itertools.product(sizes, unrolls, partitions, blocks):
+        if n % b or (p == 'block') != (b > 1) or u > n // b:
+            continue
+        results.append(estimate(Variant(f'u{u}-{p}-b{b}', u, p, b), n))
+    results.sort(key=lambda r: (r['n'], r['latency'], r['dsp'], r['unroll']))
+    return results
+
+
+def pareto(results:list) -> list:
+    """Keep the estimates not dominated in both latency and DSP count, per matrix size.
+    Among equal points the first one, i.e. the smallest unroll factor, is kept."""
+    front, seen = [], set()
+    for r in results:
+        key = (r['n'], r['latency'], r['dsp'])
+        if key in seen:
+            continue
+        seen.add(key)
+        if not any(o['n'] == r['n'] and o['latency'] <= r['latency'] and o['dsp'] <= r['dsp'] and
+                   (o['latency'], o['dsp']) != (r['latency'], r['dsp']) for o in results):
+            front.append(r)
+    return front
+
+
+def _print_table(rows:list) -> None:
+    print(f"{'variant':<22}{'N':>6}{'II':>4}{'latency':>12}{'interval':>12}{'DSP':>6}{'BRAM':>6}{'ports':>8}")
+    for r in rows:
+        print(f"{r['variant']:<22}{r['n']:>6}{r['ii']:>4}{r['latency']:>12}{r['interval']:>12}{r['dsp']:>6}{r['bram']:>6}{r['ports']:>8}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Golden model and HLS estimator of matmult.c')
+    parser.add_argument('--tb', default=os.path.join(HERE, 'tb_matmult.c'), help='tb_matmult.c, for the test matrices')
+    parser.add_argument('--large', type=int, default=1024, help='Size of the random full-range check, 0 to skip')
+    parser.add_argument('--sweep', type=int, nargs='*', default=None, help='Matrix sizes of the design space sweep')
+    parser.add_argument('--all', action='store_true', help='Print every point of the sweep, not only the Pareto front')
+    args = parser.parse_args()
+
+    ######## Golden model ########
+    vectors = parse_testbench(args.tb)
+    A, B = vectors['A'], vectors['B']
+    reference = matmult_per_step(A, B)
+    print(f"Testbench N={len(A)}: golden {'passed' if np.array_equal(matmult_golden(A, B), reference) else 'failed'}, "
+          f"blocked {'passed' if np.array_equal(matmult_blocked(A, B), reference) else 'failed'}")
+
+    if args.large > 0:
+        n = args.large
+        if n > SHRT_MAX:
+            print(f'Warning: N={n} overflows the short loop counters of tb_matmult.c, its loops would not terminate')
+        rng = np.random.default_rng(0)
+        A = rng.integers(-(1 << 15), 1 << 15, (n, n), dtype=np.int64)
+        B = rng.integers(-(1 << 15), 1 << 15, (n, n), dtype=np.int64)
+        start_time = time.time()
+        golden = matmult_golden(A, B)
+        golden_time = time.time() - start_time
+        blocked = matmult_blocked(A, B)
+        # a few entries with Python's unbounded ints as an independent check
+        spot = all(int(golden[i, j]) == (int(A[i].astype(object) @ B[:, j].astype(object)) + (1 << 15)) % (1 << 16) - (1 << 15)
+                   for i, j in rng.integers(0, n, (64, 2)))
+        print(f"Random N={n}: blocked {'matches' if np.array_equal(golden, blocked) else 'differs from'} golden, "
+              f"exact spot check {'passed' if spot else 'failed'}, golden RunTime={golden_time:.3f}s")
+
+    ######## Estimator ########
+    start_time = time.time()
+    rows = [estimate(v, 16) for v in VARIANTS]
+    print(f'\nVariants of matmult.c at N=16 (csynth latency/interval: original 2057/2058, partition 260/256):')
+    _print_table(rows)
+    if args.sweep is not None:
+        results = sweep(args.sweep or [16, 32, 64, 128])
+        runtime = time.time() - start_time
+        print(f"\nSweep: {len(results)} points in {runtime * 1000:.1f}ms{'' if args.all else ', Pareto front (latency, DSP)'}")
+        _print_table(results if args.all else pareto(results))
+
+
+if __name__ == '__main__':
+    main()
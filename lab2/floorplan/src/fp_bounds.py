@@ -0,0 +1,139 @@
+'''
+Copyright (c) 2024 by Albresky, All Rights Reserved.
+
+Author: Albresky albre02@outlook.com
+Date: 2026-10-19 14:04:07
+LastEditTime: 2026-10-19 14:45:04
+FilePath: /EDA-assignments/lab2/floorplan/src/fp_bounds.py
+
+Description: Lower bounds of the floorplan area and wirelength, and the optimality gap
+             of a cost against them.
+'''
+
+from fp_units import Outline, Terminal, Block
+
+
+def min_extents(outline:Outline, blocks:list) -> tuple:
+    """The smallest width and height any fitting floorplan can have. A block lies on its
+    short side unless its long side is taller (wider) than the outline, then the rotation
+    is forced.
+
+    Args:
+        outline (Outline): The outline.
+        blocks (list): The Block refs.
+
+    Returns:
+        tuple: The min width and the min height.
+    """
+    min_w, min_h = 0, 0
+    for block in blocks:
+        short, long = sorted((block.width, block.height))
+        min_w = max(min_w, long if long > outline.h else short)
+        min_h = max(min_h, long if long > outline.w else short)
+    return min_w, min_h
+
+
+def area_lower_bound(outline:Outline, blocks:list) -> int:
+    """The sum of the block areas, or the min width times the min height when larger.
+
+    Args:
+        outline (Outline): The outline.
+        blocks (list): The Block refs.
+
+    Returns:
+        int: The lower bound of the bounding box area.
+    """
+    min_w, min_h = min_extents(outline, blocks)
+    return max(sum(b.width * b.height for b in blocks), min_w * min_h)
+
+
+def span_lower_bound(low:float, high:float, length:int, limit:int) -> float:
+    """The shortest interval covering the terminal span [low, high] and some block interval
+    of `length` inside [0, limit]. The span is convex in the block position, so the minimum
+    is at one of the breakpoints.
+
+    Args:
+        low, high (float): The terminal span, empty when low > high.
+        length (int): The block extent along the axis.
+        limit (int): The outline size along the axis.
+
+    Returns:
+        float: The lower bound of the net span along the axis.
+    """
+    if low > high:
+        return length
+    last = max(limit - length, 0)
+    starts = [min(max(s, 0), last) for s in (0, last, low, high - length)]
+    return min(max(high, s + length) - min(low, s) for s in starts)
+
+
+def hpwl_lower_bound(outline:Outline, blocks:list, nets:list) -> int:
+    """The sum over the nets of a lower bound of their half-perimeter, with a block pin
+    spanning the whole block as in the floorplanners. The terminals are fixed, and every
+    block of the net lies inside the outline with an extent of at least its short side,
+    or at least the sum of both sides over the two axes.
+
+    Args:
+        outline (Outline): The outline.
+        blocks (list): The Block refs.
+        nets (list): The Net refs.
+
+    Returns:
+        int: The lower bound of the total wirelength.
+    """
+    placed = {id(b) for b in blocks}
+    total = 0
+    for net in nets:
+        terms = [n for n in net.get_nodes() if isinstance(n, Terminal)]
+        sizes = [(n.width, n.height) for n in net.get_nodes() if isinstance(n, Block) and id(n) in placed]
+        x_low, x_high = min((t.x for t in terms), default=float('inf')), max((t.x for t in terms), default=float('-inf'))
+        y_low, y_high = min((t.y for t in terms), default=float('inf')), max((t.y for t in terms), default=float('-inf'))
+        if not sizes:
+            total += max(x_high - x_low, 0) + max(y_high - y_low, 0)
+            continue
+        short = max(min(w, h) for w, h in sizes)
+        bound = span_lower_bound(x_low, x_high, short, outline.w) + span_lower_bound(y_low, y_high, short, outline.h)
+        total += max(bound, max(w + h for w, h in sizes))
+    return int(total)
+
+
+def optimality_gap(cost:float, bound:float) -> float:
+    """The relative gap of a cost above its lower bound, inf without a solution."""
+    if bound <= 0:
+        return 0.0 if cost <= 0 else float('inf')
+    return max(cost - bound, 0) / bound
+
+
+class Bounds:
+    """The lower bounds of a design, computed once before the annealing.
+    """
+    def __init__(self, outline:Outline, blocks:list, nets:list) -> None:
+        """The constructor of the bounds.
+
+        Args:
+            outline (Outline): The outline.
+            blocks (list): The Block refs.
+            nets (list): The Net refs.
+        """
+        self.area = area_lower_bound(outline, blocks)
+        self.wirelength = hpwl_lower_bound(outline, blocks, nets)
+
+    def cost(self, alpha:float, area_norm:float, wirelen_norm:float) -> float:
+        """The lower bound of the annealing cost `alpha * area / area_norm +
+        (1 - alpha) * wirelength / wirelen_norm`, with the normalization of the engine.
+        """
+        return alpha * self.area / area_norm + (1 - alpha) * self.wirelength / wirelen_norm
+
+    def report(self) -> str:
+        return f'Lower bounds: area={self.area} wirelength={self.wirelength}'
+
+
+if __name__ == '__main__':
+    import sys
+    from fp_parser import parse_dotblock, parse_dotnet
+
+    ######## Test Bounds ########
+    name = sys.argv[1] if len(sys.argv) > 1 else 'ami33'
+    outline, blocks, terminals = parse_dotblock(f'../testcases/{name}.block')
+    nets = parse_dotnet(f'../testcases/{name}.nets', blocks, terminals)
+    print(Bounds(outline, blocks.get_units(), nets.get_units()).report())
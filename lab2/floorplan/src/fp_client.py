@@ -0,0 +1,121 @@
+'''
+Copyright (c) 2024 by Albresky, All Rights Reserved.
+
+Author: Albresky albre02@outlook.com
+Date: 2026-10-19 13:15:29
+LastEditTime: 2026-10-19 14:04:07
+FilePath: /EDA-assignments/lab2/floorplan/src/fp_client.py
+
+Description: Client of the resident floorplanning service, a drop-in for `main.py` runs.
+'''
+
+import os, sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '.'))
+
+import json
+import socket
+import argparse
+from fp_utils import load_config
+
+
+class FloorplanClient:
+    """Blocking client of `FloorplanServer`, one connection can carry many jobs.
+    """
+    def __init__(self, socket_path:str = None, host:str = '127.0.0.1', port:int = None) -> None:
+        """The constructor of the client.
+
+        Args:
+            socket_path (str, optional): The Unix socket path. Defaults to None.
+            host (str, optional): The TCP host, used when `port` is given. Defaults to '127.0.0.1'.
+            port (int, optional): The TCP port. Defaults to None.
+        """
+        if port is not None:
+            self.sock = socket.create_connection((host, port))
+        else:
+            self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self.sock.connect(socket_path)
+        self.stream = self.sock.makefile('rb')
+
+    def close(self) -> None:
+        self.stream.close()
+        self.sock.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def submit(self, request:dict):
+        """Submit a job and yield the streamed events until it finishes.
+
+        Args:
+            request (dict): The job request.
+
+        Yields:
+            dict: The events sent back by the server.
+        """
+        self.sock.sendall((json.dumps(request) + '\n').encode())
+        while True:
+            line = self.stream.readline()
+            if not line:
+                raise ConnectionError('Server closed the connection')
+            event = json.loads(line)
+            yield event
+            if event['event'] in ('done', 'error', 'stats'):
+                return
+
+    def run(self, request:dict) -> dict:
+        """Submit a job and collect the streamed events into one result.
+
+        Args:
+            request (dict): The job request.
+
+        Returns:
+            dict: The summary and the block rectangles.
+        """
+        result = {'summary': None, 'blocks': []}
+        for event in self.submit(request):
+            if event['event'] == 'error':
+                raise RuntimeError(event['message'])
+            elif event['event'] == 'summary':
+                result['summary'] = event
+            elif event['event'] == 'blocks':
+                result['blocks'].extend(event['rows'])
+        return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Submit a floorplan job to the resident service')
+    parser.add_argument('--socket', default='/tmp/floorplan.sock', help='Unix socket path')
+    parser.add_argument('--port', type=int, default=None, help='Connect to localhost TCP instead of a Unix socket')
+    parser.add_argument('--config', default='./config.json', help='The config file, same format as for main.py')
+    parser.add_argument('--output', default=None, help='Write the .output file on the server side')
+    parser.add_argument('--stats', action='store_true', help='Print the cache statistics of the server')
+    parser.add_argument('--shutdown', action='store_true', help='Stop the server')
+    args = parser.parse_args()
+
+    with FloorplanClient(args.socket, port=args.port) as client:
+        if args.stats:
+            print(next(client.submit({'job': 'stats'}))['cache'])
+        elif args.shutdown:
+            list(client.submit({'job': 'shutdown'}))
+        else:
+            cfg = load_config(args.config)
+            request = {
+                'job': 'floorplan',
+                'blocks': os.path.abspath(cfg['file']['blocks']),
+                'nets': os.path.abspath(cfg['file']['nets']),
+                'engine': cfg.get('engine', 'bstar'),
+                'seed': cfg.get('seed'),
+                'sa_params': cfg['sa_params'],
+                'output': os.path.abspath(args.output) if args.output else None,
+            }
+            summary = client.run(request)['summary']
+            print(f"Cost={summary['cost']} Area={summary['area']} Wirelength={summary['wirelength']} "
+                  f"Gap={summary['gap']:.2%} Valid={summary['valid']} RunTime={summary['runtime']:.3f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,125 @@
+'''
+Copyright (c) 2024 by Albresky, All Rights Reserved.
+
+Author: Albresky albre02@outlook.com
+Date: 2026-10-19 13:50:48
+LastEditTime: 2026-10-19 13:50:48
+FilePath: /EDA-assignments/lab2/floorplan/src/fp_compaction.py
+
+Description: Constraint-graph compaction, pushes every block to its longest-path position
+             to the left and to the bottom in O(n log n) per pass.
+'''
+
+from fp_units import Block
+
+
+class Skyline:
+    """Segment tree over elementary intervals with range assignment and range max. It
+    stores the skyline (the right edge of the last compacted block) along one axis.
+    """
+    def __init__(self, size:int) -> None:
+        self.size = max(size, 1)
+        self.best = [0] * (4 * self.size)
+        self.lazy = [None] * (4 * self.size)
+
+    def _push(self, node:int) -> None:
+        value = self.lazy[node]
+        if value is not None:
+            for child in (2 * node, 2 * node + 1):
+                self.best[child] = value
+                self.lazy[child] = value
+            self.lazy[node] = None
+
+    def query(self, low:int, high:int, node:int = 1, left:int = 0, right:int = None) -> int:
+        """The max value over the elementary intervals [low, high)."""
+        if right is None:
+            right = self.size
+        if high <= left or right <= low:
+            return 0
+        if low <= left and right <= high:
+            return self.best[node]
+        self._push(node)
+        mid = (left + right) // 2
+        return max(self.query(low, high, 2 * node, left, mid), self.query(low, high, 2 * node + 1, mid, right))
+
+    def assign(self, low:int, high:int, value:int, node:int = 1, left:int = 0, right:int = None) -> None:
+        """Set the elementary intervals [low, high) to value."""
+        if right is None:
+            right = self.size
+        if high <= left or right <= low:
+            return
+        if low <= left and right <= high:
+            self.best[node] = value
+            self.lazy[node] = value
+            return
+        self._push(node)
+        mid = (left + right) // 2
+        self.assign(low, high, value, 2 * node, left, mid)
+        self.assign(low, high, value, 2 * node + 1, mid, right)
+        self.best[node] = max(self.best[2 * node], self.best[2 * node + 1])
+
+
+def compact_axis(pos:list, size:list, cross_pos:list, cross_size:list) -> list:
+    """Longest-path positions along one axis. Blocks whose projections on the cross axis
+    overlap are ordered by their current position, which is the constraint graph of the
+    placement; sweeping in that order, a block goes right behind the highest skyline over
+    its cross span, and its own far edge becomes the new skyline there. Since that edge is
+    above every skyline value it covers, the skyline only needs range assignment.
+
+    Args:
+        pos (list): Positions along the compacted axis.
+        size (list): Sizes along the compacted axis.
+        cross_pos (list): Positions along the cross axis.
+        cross_size (list): Sizes along the cross axis.
+
+    Returns:
+        list: The compacted positions.
+    """
+    coords = sorted(set(cross_pos) | set(p + s for p, s in zip(cross_pos, cross_size)))
+    index = {c: k for k, c in enumerate(coords)}
+    skyline = Skyline(len(coords) - 1)
+    new_pos = list(pos)
+    for i in sorted(range(len(pos)), key=lambda i: (pos[i], cross_pos[i])):
+        low, high = index[cross_pos[i]], index[cross_pos[i] + cross_size[i]]
+        if low == high:
+            continue
+        new_pos[i] = skyline.query(low, high)
+        skyline.assign(low, high, new_pos[i] + size[i])
+    return new_pos
+
+
+def compact(blocks:list, max_passes:int = 4) -> bool:
+    """Compact the blocks to the left and to the bottom, alternately, until nothing moves.
+    The result has no overlaps, and for a placement without overlaps the coordinates only
+    decrease, so it stays within the outline.
+
+    Args:
+        blocks (list): The Block refs, updated in place.
+        max_passes (int, optional): The max number of left + down passes. Defaults to 4.
+
+    Returns:
+        bool: Whether any block moved.
+    """
+    moved = False
+    for _ in range(max_passes):
+        xs, ys = [b.x for b in blocks], [b.y for b in blocks]
+        ws, hs = [b.width for b in blocks], [b.height for b in blocks]
+        xs = compact_axis(xs, ws, ys, hs)
+        ys = compact_axis(ys, hs, xs, ws)
+        changed = [b for b, x, y in zip(blocks, xs, ys) if (b.x, b.y) != (x, y)]
+        for block, x, y in zip(blocks, xs, ys):
+            block.x, block.y = x, y
+        if not changed:
+            break
+        moved = True
+    return moved
+
+
+if __name__ == '__main__':
+    ######## Test compact ########
+    blocks = []
+    for name, x, y, w, h in [('a', 3, 5, 2, 2), ('b', 6, 1, 2, 3), ('c', 9, 6, 1, 1), ('d', 0, 9, 4, 1)]:
+        blocks.append(Block(name, w, h, x, y))
+    compact(blocks)
+    for block in blocks:
+        print(block.name, block.x, block.y)
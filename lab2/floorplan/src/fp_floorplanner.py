@@ -13,6 +13,11 @@ import random
 import math
 from fp_units import Outline, Terminal, Terminals, Block, Blocks, Nets
 from fp_bstar import BStarTree
+from fp_verifier import verify_floorplan
+from fp_compaction import compact
+from fp_memo import CostCache, zobrist_key, DEFAULT_CACHE_SIZE
+from fp_quadratic import quadratic_seed
+from fp_bounds import Bounds, optimality_gap
 
 class FloorPlanner:
     """The floorplanner class is used to place the blocks within the outline and optimize the floorplan using simulated annealing.
@@ -23,7 +28,10 @@ class FloorPlanner:
                  terminals:Terminals, 
                  nets:Nets, 
                  temperature: int = 1000, 
-                 alpha: float = 0.95
+                 alpha: float = 0.95,
+                 compact_every: int = 0,
+                 cache_size: int = DEFAULT_CACHE_SIZE,
+                 gap_target: float = 0.0
         ) -> None:
         """The constructor of the floorplanner.
 
@@ -34,6 +42,12 @@ class FloorPlanner:
             nets (Nets): The Nets object.
             temperature (int, optional): Parameter for simulated annealing. Defaults to 1000.
             alpha (float, optional): Parameter for simulated annealing. Defaults to 0.95.
+            compact_every (int, optional): Compact the floorplan every `compact_every` iterations of
+                simulated annealing, 0 to compact only at the end. Defaults to 0.
+            cache_size (int, optional): The max number of evaluated states kept in the cost cache
+                during simulated annealing, 0 to disable it. Defaults to 65536.
+            gap_target (float, optional): Stop the simulated annealing once the cost is within this
+                relative gap of its lower bound, 0 to disable it. Defaults to 0.
         """
         self.outline = outline
         self.blocks = blocks.get_units()
@@ -42,16 +56,39 @@ class FloorPlanner:
         self.bstar_tree = BStarTree(outline, blocks)
         self.temperature = temperature
         self.alpha = alpha
+        self.compact_every = compact_every
         self.best_cost = float('inf')
         self.best_x = float('inf')
         self.best_y = float('inf')
         self.operations = []
+        self.cost_cache = CostCache(cache_size) if cache_size > 0 else None
+        self.state_hash = None
         self.avg_wirelen = self.calculate_avg_wirelen()
+        self.bounds = Bounds(outline, self.blocks, self.nets)
+        self.gap_target = gap_target
+        self.gap = float('inf')
+        self.iterations = 0
 
-    def initialize(self) -> None:
+    def initialize(self, seed:str = None) -> None:
         """Initialize the floorplanner by placing the blocks within the outline,
         the initialization will find a valid position for each block.
+
+        Args:
+            seed (str, optional): 'quadratic' to start from the legalized quadratic placement,
+                falls back to the greedy placement when it does not fit the outline. Defaults to None.
         """
+        if seed == 'quadratic':
+            shapes = [(b.width, b.height, b.rotated) for b in self.blocks]
+            if quadratic_seed(self.outline, self.blocks, self.nets) and verify_floorplan(self.outline, self.blocks).is_valid:
+                print('Initialized from the quadratic placement')
+                return
+            print('Quadratic placement does not fit the outline, falling back to the greedy placement')
+            for block, (w, h, rotated) in zip(self.blocks, shapes):
+                block.width, block.height, block.rotated = w, h, rotated
+                block.x, block.y, block.placed = 0, 0, False
+        elif seed is not None:
+            raise ValueError(f'Unknown seed {seed}')
+
         # Sort the blocks from large to small based on area(width * height)
         self.blocks.sort(key=lambda block: block.width * block.height, reverse=True)
         placed_blocks = []
@@ -175,15 +212,10 @@ class FloorPlanner:
             bool: Whether all blocks are valid.
         """
         
-        isvalid = True
-        for block in self.blocks:
-            if not block.placed:
-                print(f'Block {block.name} is not placed')
-                return False
-            if not self.check_valid(block):
-                print(f'Block {block.name} is invalid @({block.x}, {block.y})')
-                isvalid = False
-        return isvalid
+        result = verify_floorplan(self.outline, self.blocks)
+        if not result.is_valid:
+            print(result.report())
+        return result.is_valid
 
     def is_block_within_outline(self, 
                                 block: Block
@@ -222,14 +254,23 @@ class FloorPlanner:
                            max_iterations:int = 1000
         ) -> None:
         """The main function of simulated annealing, optimize the floorplan by perturbing the blocks.
+        The one-unit moves are interleaved with compaction passes, see `compact_every`, and the
+        annealing stops early once the optimality gap reaches `gap_target`.
 
         Args:
             max_iterations (int, optional): The max iterations of the simulated annealing. Defaults to 1000.
         """
         
         recent_costs = []
-        
+        cost_bound = self.bounds.cost(self.alpha, sum(b.width * b.height for b in self.blocks), self.avg_wirelen)
+        print(self.bounds.report())
+        self.block_index = {id(b): i for i, b in enumerate(self.blocks)}
+        self.rehash()
+
         for i in range(max_iterations):
+            self.iterations = i + 1
+            if self.compact_every and i > 0 and i % self.compact_every == 0:
+                self.compact()
             best_cost, max_x, max_y, _, _ = self.calculate_cost()
             for blk in self.blocks:
                 self.perturb(blk)
@@ -247,6 +288,13 @@ class FloorPlanner:
 
             self.best_cost = best_cost
             self.best_x, self.best_y = max_x, max_y
+            # best_cost is the lowest cost seen, not a placement that is kept, so the gap
+            # is taken on the current placement, the one the annealing ends with
+            cost, _, _, _, _ = self.calculate_cost()
+            self.gap = optimality_gap(cost, cost_bound)
+            if self.gap_target and self.gap <= self.gap_target:
+                print(f"SA has reached gap {self.gap:.2%} at iteration {i} with cost {cost}")
+                break
                 
             # Update the latest cost
             recent_costs.append(best_cost)
@@ -257,10 +305,56 @@ class FloorPlanner:
             if len(recent_costs) == 10 and abs(sum(recent_costs) - recent_costs[0]*10) < 1e-9:
                 print(f"SA has converged at iteration {i} with cost {best_cost}")
                 break
-            print(f"SA[{i}] Cost={best_cost}")
-            
+            print(f"SA[{i}] Cost={best_cost} Gap={self.gap:.2%}")
+
+        self.state_hash = None
+        self.compact(only_if_better=True)
+        self.best_cost, self.best_x, self.best_y, _, _ = self.calculate_cost()
+        self.gap = optimality_gap(self.best_cost, cost_bound)
+        if self.cost_cache is not None:
+            print(self.cost_cache.report())
         print(f'SA finished, {len(self.blocks)}')
 
+    def block_key(self, block:Block) -> int:
+        """The Zobrist key of a block state, the width tells the rotation."""
+        return zobrist_key(self.block_index[id(block)], block.x, block.y, block.width)
+
+    def rehash(self) -> None:
+        """Recompute the state hash from scratch, needed after blocks moved outside
+        `move_block` and `rotate_block`. Does nothing when the cost cache is disabled.
+        """
+        if self.cost_cache is None:
+            return
+        h = 0
+        for block in self.blocks:
+            h ^= self.block_key(block)
+        self.state_hash = h
+
+    def compact(self, only_if_better:bool = False) -> bool:
+        """Push every block to its longest-path position to the left and to the bottom,
+        which replaces the many one-unit moves it takes to slide blocks there.
+
+        Args:
+            only_if_better (bool, optional): Keep the compacted placement only if it lowers the
+                cost, pushing blocks together can lengthen the wires. Defaults to False.
+
+        Returns:
+            bool: Whether the compacted placement is kept.
+        """
+        if only_if_better:
+            cost, _, _, _, _ = self.calculate_cost()
+            saved = [(b.x, b.y) for b in self.blocks]
+        compact(self.blocks)
+        if self.state_hash is not None:
+            self.rehash()
+        if only_if_better and self.calculate_cost()[0] >= cost:
+            for block, (x, y) in zip(self.blocks, saved):
+                block.x, block.y = x, y
+            if self.state_hash is not None:
+                self.rehash()
+            return False
+        return True
+
     def perturb(self, 
                 block:Block
         ) -> Block:
@@ -306,8 +400,12 @@ class FloorPlanner:
         if block is None:
             block = random.choice(self.blocks)
         
+        if self.state_hash is not None:
+            self.state_hash ^= self.block_key(block)
         block.rotated = True
         block.width, block.height = block.height, block.width
+        if self.state_hash is not None:
+            self.state_hash ^= self.block_key(block)
         if first_try:
             self.operations.append(('rotate', block))
 
@@ -327,8 +425,12 @@ class FloorPlanner:
         """
         if block is None:
             block = random.choice(self.blocks)
+        if self.state_hash is not None:
+            self.state_hash ^= self.block_key(block)
         block.x += x
         block.y += y
+        if self.state_hash is not None:
+            self.state_hash ^= self.block_key(block)
         if first_try:
             self.operations.append(('move', block, x, y))
     
@@ -359,11 +461,18 @@ class FloorPlanner:
         Returns:
             tuple: The cost, area, and wirelength of current floorplan.
         """
-        
+        # States seen before during simulated annealing are served from the cost cache
+        if self.state_hash is not None:
+            cached = self.cost_cache.get(self.state_hash)
+            if cached is not None:
+                return cached
+
         max_x, max_y, area, area_norm = self.calculate_area()
         wire_len = self.calculate_wirelength()
         cost = self.alpha * area/area_norm + (1 - self.alpha) * wire_len / self.avg_wirelen
         # print(f"area:{area}, anom:{area_norm}, wire:{wire_len}, wirenorm:{self.avg_wirelen}")
+        if self.state_hash is not None:
+            self.cost_cache.put(self.state_hash, (cost, max_x, max_y, area, wire_len))
         return cost, max_x, max_y, area, wire_len
 
     def calculate_area(self) -> int:
@@ -0,0 +1,84 @@
+'''
+Copyright (c) 2024 by Albresky, All Rights Reserved.
+
+Author: Albresky albre02@outlook.com
+Date: 2026-10-19 13:53:00
+LastEditTime: 2026-10-19 13:53:00
+FilePath: /EDA-assignments/lab2/floorplan/src/fp_memo.py
+
+Description: Zobrist-style state hashing and a bounded LRU cache of evaluated costs.
+'''
+
+from collections import OrderedDict
+
+MASK64 = (1 << 64) - 1
+DEFAULT_CACHE_SIZE = 1 << 16
+
+
+def splitmix64(x:int) -> int:
+    """The splitmix64 finalizer, a cheap 64-bit mixing function."""
+    x = (x + 0x9E3779B97F4A7C15) & MASK64
+    x = ((x ^ (x >> 30)) * 0xBF58476D1CE4E5B9) & MASK64
+    x = ((x ^ (x >> 27)) * 0x94D049BB133111EB) & MASK64
+    return x ^ (x >> 31)
+
+
+def zobrist_key(*fields) -> int:
+    """The random key of one component of the state, e.g. (block index, x, y, width). The
+    coordinates are unbounded, so the keys are computed by mixing instead of being drawn
+    from a table. The state hash is the XOR of the keys of all components, and changing a
+    component updates it by XOR-ing out the old key and XOR-ing in the new one.
+
+    Returns:
+        int: The 64-bit key.
+    """
+    h = 0
+    for field in fields:
+        h = splitmix64(h ^ (int(field) & MASK64))
+    return h
+
+
+class CostCache:
+    """Bounded LRU cache of cost tuples keyed by state hash.
+    """
+    def __init__(self, max_entries:int = DEFAULT_CACHE_SIZE) -> None:
+        """The constructor of the cost cache.
+
+        Args:
+            max_entries (int, optional): The max number of cached states. Defaults to 65536.
+        """
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key:int):
+        """Get the cached value of a state, None on a miss."""
+        value = self.entries.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.entries.move_to_end(key)
+        return value
+
+    def put(self, key:int, value) -> None:
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self.entries),
+            'max_entries': self.max_entries,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+        }
+
+    def report(self) -> str:
+        stats = self.stats()
+        return (f"Cost cache: hits={stats['hits']} misses={stats['misses']} "
+                f"hit rate={stats['hit_rate']:.2%} entries={stats['entries']}/{stats['max_entries']}")
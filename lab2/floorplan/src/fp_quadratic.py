@@ -0,0 +1,253 @@
+'''
+Copyright (c) 2024 by Albresky, All Rights Reserved.
+
+Author: Albresky albre02@outlook.com
+Date: 2026-10-19 14:02:22
+LastEditTime: 2026-10-19 14:53:25
+FilePath: /EDA-assignments/lab2/floorplan/src/fp_quadratic.py
+
+Description: Analytical quadratic placement seed: conjugate gradient over the sparse net
+             Laplacian with the terminals fixed, then spreading and legalization.
+'''
+
+import numpy as np
+from fp_units import Outline, Terminal, Block
+from fp_compaction import compact
+
+ANCHOR_WEIGHT = 1e-3  # pull towards the outline center, keeps the system positive definite
+
+
+class SparseMatrix:
+    """Symmetric matrix in coordinate form, enough for the matrix-vector products of CG.
+    """
+    def __init__(self, n:int, rows:list, cols:list, data:list) -> None:
+        self.n = n
+        self.rows = np.asarray(rows, dtype=np.int64)
+        self.cols = np.asarray(cols, dtype=np.int64)
+        self.data = np.asarray(data, dtype=np.float64)
+
+    def dot(self, x:np.ndarray) -> np.ndarray:
+        return np.bincount(self.rows, weights=self.data * x[self.cols], minlength=self.n)
+
+    def diagonal(self) -> np.ndarray:
+        diag = self.rows == self.cols
+        return np.bincount(self.rows[diag], weights=self.data[diag], minlength=self.n)
+
+
+def conjugate_gradient(A:SparseMatrix, b:np.ndarray, x0:np.ndarray = None, tol:float = 1e-8, max_iterations:int = None) -> np.ndarray:
+    """Solve A x = b for a symmetric positive definite A with Jacobi-preconditioned CG.
+
+    Args:
+        A (SparseMatrix): The matrix.
+        b (ndarray): The right-hand side.
+        x0 (ndarray, optional): The initial guess. Defaults to zeros.
+        tol (float, optional): Relative residual to stop at. Defaults to 1e-8.
+        max_iterations (int, optional): Defaults to 10 * n.
+
+    Returns:
+        ndarray: The solution.
+    """
+    x = np.zeros(A.n) if x0 is None else x0.astype(np.float64).copy()
+    inv_diag = 1.0 / A.diagonal()
+    r = b - A.dot(x)
+    z = inv_diag * r
+    p = z.copy()
+    rz = r @ z
+    stop = tol * max(np.linalg.norm(b), 1e-30)
+    for _ in range(max_iterations or 10 * A.n):
+        if np.linalg.norm(r) <= stop:
+            break
+        Ap = A.dot(p)
+        step = rz / (p @ Ap)
+        x += step * p
+        r -= step * Ap
+        z = inv_diag * r
+        rz, rz_old = r @ z, rz
+        p = z + (rz / rz_old) * p
+    return x
+
+
+def build_system(outline:Outline, blocks:list, nets:list) -> tuple:
+    """Build the quadratic wirelength system with the clique net model: every pair of pins
+    of a k-pin net is connected by a spring of weight 1/(k-1). Block pins sit at the block
+    centers, terminals are fixed and move to the right-hand side.
+
+    Args:
+        outline (Outline): The outline.
+        blocks (list): The movable Block refs.
+        nets (list): The Net refs.
+
+    Returns:
+        tuple: The Laplacian and the right-hand sides for x and y.
+    """
+    n = len(blocks)
+    index = {id(b): i for i, b in enumerate(blocks)}
+    rows, cols, data = [], [], []
+    diag = np.full(n, ANCHOR_WEIGHT)
+    bx = np.full(n, ANCHOR_WEIGHT * outline.w / 2)
+    by = np.full(n, ANCHOR_WEIGHT * outline.h / 2)
+    for net in nets:
+        movable = [index[id(node)] for node in net.get_nodes() if isinstance(node, Block) and id(node) in index]
+        fixed = [(node.x, node.y) for node in net.get_nodes() if isinstance(node, Terminal)]
+        k = len(movable) + len(fixed)
+        if k < 2 or not movable:
+            continue
+        w = 1.0 / (k - 1)
+        for a in range(len(movable)):
+            diag[movable[a]] += w * (k - 1)
+            for c in range(a + 1, len(movable)):
+                rows.extend((movable[a], movable[c]))
+                cols.extend((movable[c], movable[a]))
+                data.extend((-w, -w))
+            for tx, ty in fixed:
+                bx[movable[a]] += w * tx
+                by[movable[a]] += w * ty
+    rows.extend(range(n))
+    cols.extend(range(n))
+    data.extend(diag.tolist())
+    return SparseMatrix(n, rows, cols, data), bx, by
+
+
+def solve_quadratic(outline:Outline, blocks:list, nets:list) -> tuple:
+    """The block centers minimizing the quadratic wirelength.
+
+    Returns:
+        tuple: The x and y arrays of the block centers.
+    """
+    L, bx, by = build_system(outline, blocks, nets)
+    return conjugate_gradient(L, bx), conjugate_gradient(L, by)
+
+
+def spread(centers:np.ndarray, sizes:np.ndarray, length:float) -> np.ndarray:
+    """Spread the centers along one axis by cumulative area: keep the order of the solution
+    and give every block a share of the length proportional to its area.
+    """
+    order = np.argsort(centers, kind='stable')
+    cum = np.cumsum(sizes[order]) - sizes[order] / 2
+    out = np.empty(len(centers))
+    out[order] = cum / sizes.sum() * length
+    return out
+
+
+def legalize(outline:Outline, blocks:list, cx:np.ndarray, cy:np.ndarray) -> bool:
+    """Skyline legalization: blocks are taken by target y and dropped onto the skyline at
+    the position and orientation with the lowest top, ties broken by the distance to the
+    target x. The result is compacted to the left and to the bottom.
+
+    Args:
+        outline (Outline): The outline.
+        blocks (list): The Block refs, updated in place.
+        cx, cy (ndarray): The spread block centers.
+
+    Returns:
+        bool: Whether the result fits the outline.
+    """
+    skyline = [(0, outline.w, 0)]  # (x, width, height) segments, left to right
+    for i in sorted(range(len(blocks)), key=lambda i: (cy[i], cx[i])):
+        block = blocks[i]
+        best = None
+        for w, h in {(block.width, block.height), (block.height, block.width)}:
+            starts = [seg[0] for seg in skyline] + [seg[0] + seg[1] - w for seg in skyline]
+            for x in starts:
+                if x < 0 or x + w > max(outline.w, w):
+                    continue
+                y = max(seg[2] for seg in skyline if seg[0] < x + w and seg[0] + seg[1] > x)
+                key = (max(y + h - outline.h, 0), y + h, abs(x + w / 2 - cx[i]))
+                if best is None or key < best[0]:
+                    best = (key, x, y, w, h)
+        _, x, y, w, h = best
+        if (w, h) != (block.width, block.height):
+            block.rotated = not block.rotated
+        block.x, block.y, block.width, block.height = x, y, w, h
+
+        # Raise the skyline over [x, x + w)
+        merged = []
+        for sx, sw, sh in skyline:
+            if sx + sw <= x or sx >= x + w:
+                merged.append((sx, sw, sh))
+                continue
+            if sx < x:
+                merged.append((sx, x - sx, sh))
+            if sx + sw > x + w:
+                merged.append((x + w, sx + sw - x - w, sh))
+        merged.append((x, w, y + h))
+        merged.sort()
+        skyline = []
+        for seg in merged:
+            if skyline and skyline[-1][2] == seg[2] and skyline[-1][0] + skyline[-1][1] == seg[0]:
+                skyline[-1] = (skyline[-1][0], skyline[-1][1] + seg[1], seg[2])
+            else:
+                skyline.append(seg)
+
+    compact(blocks)
+    for block in blocks:
+        block.placed = True
+    return max(b.x + b.width for b in blocks) <= outline.w and max(b.y + b.height for b in blocks) <= outline.h
+
+
+def quadratic_centers(outline:Outline, blocks:list, nets:list) -> tuple:
+    """The quadratic placement spread over the outline, the targets of legalization.
+
+    Args:
+        outline (Outline): The outline.
+        blocks (list): The Block refs.
+        nets (list): The Net refs.
+
+    Returns:
+        tuple: The x and y arrays of the spread block centers.
+    """
+    cx, cy = solve_quadratic(outline, blocks, nets)
+    areas = np.array([b.width * b.height for b in blocks], dtype=np.float64)
+    return spread(cx, areas, outline.w), spread(cy, areas, outline.h)
+
+
+def quadratic_seed(outline:Outline, blocks:list, nets:list) -> bool:
+    """Place the blocks by quadratic placement, spreading and legalization.
+
+    Args:
+        outline (Outline): The outline.
+        blocks (list): The Block refs, updated in place.
+        nets (list): The Net refs.
+
+    Returns:
+        bool: Whether the legalized placement fits the outline.
+    """
+    if not blocks:
+        return True
+    sx, sy = quadratic_centers(outline, blocks, nets)
+    return legalize(outline, blocks, sx, sy)
+
+
+def slicing_expression(cx:np.ndarray, cy:np.ndarray, horizontal:bool = False) -> list:
+    """Turn the block centers into a normalized Polish expression by recursive bisection,
+    alternating the cut direction by level so that no two identical operators are adjacent.
+
+    Args:
+        cx, cy (ndarray): The block centers.
+        horizontal (bool, optional): Whether the top cut is horizontal. Defaults to False.
+
+    Returns:
+        list: The expression, block indices and -1 (H) / -2 (V) operators.
+    """
+    def build(ids:list, horizontal:bool) -> list:
+        if len(ids) == 1:
+            return ids
+        key = cy if horizontal else cx
+        ids = sorted(ids, key=lambda i: key[i])
+        mid = len(ids) // 2
+        return build(ids[:mid], not horizontal) + build(ids[mid:], not horizontal) + [-1 if horizontal else -2]
+
+    return build(list(range(len(cx))), horizontal)
+
+
+if __name__ == '__main__':
+    import sys
+    from fp_parser import parse_dotblock, parse_dotnet
+    from fp_verifier import verify_floorplan
+
+    ######## Test quadratic_seed ########
+    name = sys.argv[1] if len(sys.argv) > 1 else 'ami33'
+    outline, blocks, terminals = parse_dotblock(f'../testcases/{name}.block')
+    nets = parse_dotnet(f'../testcases/{name}.nets', blocks, terminals)
+    fits = quadratic_seed(outline, blocks.get_units(), nets.get_units())
+    print(f'fits={fits}', verify_floorplan(outline, blocks.get_units()).report())
@@ -0,0 +1,476 @@
+'''
+Copyright (c) 2024 by Albresky, All Rights Reserved.
+
+Author: Albresky albre02@outlook.com
+Date: 2026-10-19 13:15:29
+LastEditTime: 2026-10-19 14:23:11
+FilePath: /EDA-assignments/lab2/floorplan/src/fp_server.py
+
+Description: Resident floorplanning service, keeps parsed designs warm in an LRU cache
+             and runs jobs on a worker pool.
+'''
+
+import os, sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '.'))
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '../../legalization/src'))
+
+import io
+import json
+import time
+import asyncio
+import argparse
+import copy
+import contextlib
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from fp_parser import parse_dotnet, parse_dotblock
+from fp_writer import write_floorplan
+from fp_utils import create_floorplanner
+from lg_store import load_design, design_files, load_dotpl, write_dotpl
+from lg_legalizer import Legalizer
+from lg_verifier import verify_placement
+
+
+DEFAULT_SOCKET = '/tmp/floorplan.sock'
+DEFAULT_CACHE_MB = 256
+DEFAULT_ECO_SESSIONS = 2
+STREAM_CHUNK = 256
+
+
+def _deep_sizeof(obj, seen:set=None) -> int:
+    """Estimate the memory footprint of a parsed design object graph.
+
+    Args:
+        obj (object): The root object.
+        seen (set, optional): Ids of the visited objects. Defaults to None.
+
+    Returns:
+        int: The estimated size in bytes.
+    """
+    if seen is None:
+        seen = set()
+    size = 0
+    stack = [obj]
+    while stack:
+        cur = stack.pop()
+        if id(cur) in seen:
+            continue
+        seen.add(id(cur))
+        size += sys.getsizeof(cur)
+        if isinstance(cur, dict):
+            stack.extend(cur.keys())
+            stack.extend(cur.values())
+        elif isinstance(cur, (list, tuple, set)):
+            stack.extend(cur)
+        elif hasattr(cur, '__dict__'):
+            stack.append(cur.__dict__)
+    return size
+
+
+class DesignCache:
+    """LRU cache of parsed designs, evicts the least recently used designs once the
+    estimated memory exceeds the budget.
+    """
+    def __init__(self, max_bytes:int = DEFAULT_CACHE_MB << 20) -> None:
+        """The constructor of the design cache.
+
+        Args:
+            max_bytes (int, optional): The memory budget in bytes. Defaults to 256MB.
+        """
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _stamp(*paths) -> tuple:
+        return tuple(os.stat(p).st_mtime_ns for p in paths)
+
+    def get(self, kind:str, parser, *paths, depends=None):
+        """Get the parsed design of the given files, parse and cache it on a miss.
+        Entries are invalidated when any of the files is modified.
+
+        Args:
+            kind (str): The design kind, e.g. 'floorplan'.
+            parser (callable): The parser called with `paths` on a miss.
+            depends (callable, optional): Called with `paths`, returns the other files the
+                design is read from, e.g. the ones an .aux refers to. Defaults to None.
+
+        Returns:
+            object: The parsed design.
+        """
+        key, stamp, design = self.lookup(kind, *paths, depends=depends)
+        if design is None:
+            design = self.insert(key, stamp, parser(*paths))
+        return design
+
+    def lookup(self, kind:str, *paths, depends=None) -> tuple:
+        """Look the design of the given files up without parsing it, so the caller can
+        parse on a miss wherever it likes and `insert` the result.
+
+        Args:
+            kind (str): The design kind, e.g. 'floorplan'.
+            depends (callable, optional): See `get`. Defaults to None.
+
+        Returns:
+            tuple: The key, the file stamp and the design, None on a miss.
+        """
+        files = list(paths) + (list(depends(*paths)) if depends is not None else [])
+        key = (kind,) + tuple(os.path.abspath(p) for p in files)
+        stamp = self._stamp(*files)
+        entry = self.entries.get(key)
+        if entry is not None and entry[0] == stamp:
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return key, stamp, entry[1]
+        if entry is not None:
+            self._drop(key)
+        self.misses += 1
+        return key, stamp, None
+
+    def insert(self, key:tuple, stamp:tuple, design):
+        """Cache a design parsed after a miss of `lookup`, designs over the whole budget
+        are not kept.
+
+        Returns:
+            object: The design.
+        """
+        if key in self.entries:
+            self._drop(key)
+        size = _deep_sizeof(design)
+        if size <= self.max_bytes:
+            self.entries[key] = (stamp, design, size)
+            self.total_bytes += size
+            while self.total_bytes > self.max_bytes:
+                self._drop(next(iter(self.entries)))
+        return design
+
+    def _drop(self, key) -> None:
+        _, _, size = self.entries.pop(key)
+        self.total_bytes -= size
+
+    def stats(self) -> dict:
+        return {
+            'designs': len(self.entries),
+            'bytes': self.total_bytes,
+            'max_bytes': self.max_bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+        }
+
+
+class LegalizerSessions:
+    """Warm legalizers of recent ECO results. A legalizer holds the row occupancy of the
+    placement it wrote, so an ECO job whose base is that file starts from it instead of
+    rebuilding the occupancy of the whole design. A session is taken out while a job
+    runs on it and kept again under the output of the job.
+    """
+    def __init__(self, max_sessions:int = DEFAULT_ECO_SESSIONS) -> None:
+        """The constructor of the sessions.
+
+        Args:
+            max_sessions (int, optional): The max number of kept legalizers. Defaults to 2.
+        """
+        self.max_sessions = max_sessions
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _files(aux:str, pl:str) -> list:
+        return [aux, pl] + design_files(aux)
+
+    def take(self, aux:str, pl:str) -> Legalizer:
+        """Take the legalizer whose placement is the .pl file out of the sessions.
+
+        Returns:
+            Legalizer: The legalizer, None if there is none or any file changed since.
+        """
+        key = (os.path.abspath(aux), os.path.abspath(pl))
+        entry = self.entries.pop(key, None)
+        if entry is not None and entry[0] == DesignCache._stamp(*self._files(aux, pl)):
+            self.hits += 1
+            return entry[1]
+        self.misses += 1
+        return None
+
+    def keep(self, aux:str, pl:str, legalizer:Legalizer) -> None:
+        """Keep a legalizer whose placement has just been written to the .pl file."""
+        if self.max_sessions <= 0:
+            return
+        key = (os.path.abspath(aux), os.path.abspath(pl))
+        self.entries[key] = (DesignCache._stamp(*self._files(aux, pl)), legalizer)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_sessions:
+            self.entries.popitem(last=False)
+
+    def stats(self) -> dict:
+        return {
+            'sessions': len(self.entries),
+            'max_sessions': self.max_sessions,
+            'hits': self.hits,
+            'misses': self.misses,
+        }
+
+
+def parse_floorplan_design(blocks_file:str, nets_file:str) -> tuple:
+    """Parse the .block and .nets files of a floorplan design.
+
+    Returns:
+        tuple: The outline, blocks, terminals and nets.
+    """
+    outline, blocks, terminals = parse_dotblock(blocks_file)
+    nets = parse_dotnet(nets_file, blocks, terminals)
+    return outline, blocks, terminals, nets
+
+
+def run_floorplan_job(design:tuple, params:dict) -> dict:
+    """Run a floorplan job inside a worker process. The design arrives pickled, so the
+    worker owns a private copy and the cached design stays untouched.
+
+    Args:
+        design (tuple): The outline, blocks, terminals and nets.
+        params (dict): The job parameters, `engine`, `seed`, `sa_params` and the optional `output` path.
+
+    Returns:
+        dict: The result summary and the block rectangles.
+    """
+    outline, blocks, terminals, nets = design
+    sa_params = params.get('sa_params', {})
+
+    start_time = time.time()
+    with contextlib.redirect_stdout(io.StringIO()):
+        floorplanner = create_floorplanner(params.get('engine', 'bstar'), outline, blocks, terminals, nets, sa_params)
+        floorplanner.initialize(seed=params.get('seed'))
+        floorplanner.simulate_annealing(max_iterations=sa_params.get('iterations', 1000))
+        cost, _, _, area, wirelength = floorplanner.calculate_cost()
+        valid = floorplanner.check_valid_all()
+    runtime = time.time() - start_time
+
+    if params.get('output'):
+        write_floorplan(params['output'], floorplanner, cost, wirelength, area, runtime)
+
+    return {
+        'summary': {
+            'cost': cost,
+            'wirelength': wirelength,
+            'area': area,
+            'width': floorplanner.best_x,
+            'height': floorplanner.best_y,
+            'runtime': runtime,
+            'valid': valid,
+            'gap': floorplanner.gap,
+            'cost_cache': floorplanner.cost_cache.stats() if floorplanner.cost_cache is not None else None,
+        },
+        'blocks': [[b.name, b.x, b.y, b.x + b.width, b.y + b.height] for b in floorplanner.blocks],
+    }
+
+
+def run_legalize_job(design, params:dict) -> dict:
+    """Run a full legalize job inside a worker process.
+
+    Args:
+        design (DesignStore): The loaded Bookshelf design.
+        params (dict): The job parameters, the optional `output` path.
+
+    Returns:
+        dict: The result summary and the node positions.
+    """
+    start_time = time.time()
+    legalizer = Legalizer(design)
+    legalizer.legalize()
+    runtime = time.time() - start_time
+    check = verify_placement(design, legalizer.x, legalizer.y)
+
+    if params.get('output'):
+        write_dotpl(params['output'], design, legalizer.x, legalizer.y)
+
+    return {
+        'summary': {
+            'moved': len(design.nodes),
+            'max_displacement': check.max_displacement,
+            'total_displacement': check.total_displacement,
+            'over_displaced': len(check.over_displaced),
+            'runtime': runtime,
+            'valid': check.is_valid,
+        },
+        'blocks': [[design.node_names[i], x, y] for i, (x, y) in enumerate(zip(legalizer.x, legalizer.y))],
+    }
+
+
+def run_eco_job(design, legalizer:Legalizer, params:dict) -> tuple:
+    """Run an ECO legalize job on a `base` .pl and a list of `changes` (`[name, x, y]` or
+    `[name, x, y, width, height]`). It runs in the server process, so the legalizer can be
+    kept for the next job, and its cost follows the changes rather than the design: only a
+    cold start loads the base placement, and only the moved cells are reported. The full
+    check runs on request (`verify`).
+
+    Args:
+        design (DesignStore): The cached design, not modified.
+        legalizer (Legalizer): The warm legalizer of the base, None to build it.
+        params (dict): The job parameters, `base`, `changes`, `verify` and the optional `output` path.
+
+    Returns:
+        tuple: The legalizer, and the result summary with the positions of the moved cells.
+    """
+    start_time = time.time()
+    warm = legalizer is not None
+    if not warm:
+        # Added cells go into the design, so the legalizer gets its own copy
+        private = copy.deepcopy(design)
+        n = private.num_nodes
+        xs, ys = load_dotpl(params['base'], private, private.x[:n].copy(), private.y[:n].copy())
+        legalizer = Legalizer(private, xs, ys)
+    touched = legalizer.eco(params.get('changes', []))
+    runtime = time.time() - start_time
+
+    disp = [abs(legalizer.x[i] - legalizer.gx[i]) + abs(legalizer.y[i] - legalizer.gy[i]) for i in touched]
+    summary = {
+        'moved': len(touched),
+        'max_displacement': max(disp, default=0.0),
+        'total_displacement': sum(disp),
+        'over_displaced': len(legalizer.over_displaced),
+        'runtime': runtime,
+        'warm': warm,
+        'valid': not legalizer.over_displaced,
+    }
+    if params.get('verify'):
+        check = verify_placement(legalizer.design, legalizer.x, legalizer.y)
+        summary['valid'] = check.is_valid
+        summary['over_displaced'] = len(check.over_displaced)
+    if params.get('output'):
+        write_dotpl(params['output'], legalizer.design, legalizer.x, legalizer.y)
+
+    names = legalizer.design.node_names
+    return legalizer, {
+        'summary': summary,
+        'blocks': [[names[i], legalizer.x[i], legalizer.y[i]] for i in touched],
+    }
+
+
+# job name -> (design parser, design file parameters, other design files, worker function)
+JOBS = {
+    'floorplan': (parse_floorplan_design, ('blocks', 'nets'), None, run_floorplan_job),
+    'legalize': (load_design, ('aux',), design_files, run_legalize_job),
+}
+
+
+class FloorplanServer:
+    """Asyncio server speaking newline-delimited JSON over a Unix socket or localhost TCP.
+
+    Every request is one JSON object with a `job` field. The server answers with a
+    stream of events: `accepted`, `summary`, one or more `blocks` chunks and `done`,
+    or a single `error` event.
+    """
+    def __init__(self, workers:int = None, cache_bytes:int = DEFAULT_CACHE_MB << 20, eco_sessions:int = DEFAULT_ECO_SESSIONS) -> None:
+        """The constructor of the server.
+
+        Args:
+            workers (int, optional): Number of worker processes. Defaults to the CPU count.
+            cache_bytes (int, optional): Memory budget of the design cache. Defaults to 256MB.
+            eco_sessions (int, optional): Number of warm ECO legalizers. Defaults to 2.
+        """
+        self.cache = DesignCache(cache_bytes)
+        self.sessions = LegalizerSessions(eco_sessions)
+        self.pool = ProcessPoolExecutor(max_workers=workers)
+        self.job_id = 0
+        self.server = None
+
+    async def handle(self, reader:asyncio.StreamReader, writer:asyncio.StreamWriter) -> None:
+        async def send(event:dict) -> None:
+            writer.write((json.dumps(event) + '\n').encode())
+            await writer.drain()
+
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    request = json.loads(line)
+                    await self.dispatch(request, send)
+                except Exception as e:
+                    await send({'event': 'error', 'message': f'{type(e).__name__}: {e}'})
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def dispatch(self, request:dict, send) -> None:
+        job = request.get('job')
+        if job == 'stats':
+            await send({'event': 'stats', 'cache': self.cache.stats(), 'eco_sessions': self.sessions.stats()})
+            return
+        if job == 'shutdown':
+            await send({'event': 'done'})
+            self.server.close()
+            return
+        if job not in JOBS:
+            raise ValueError(f'Unknown job {job}')
+
+        parser, file_keys, depends, worker = JOBS[job]
+        self.job_id += 1
+        job_id = self.job_id
+        await send({'event': 'accepted', 'id': job_id, 'job': job})
+
+        # Parse on a miss in a thread, a large design takes seconds and would stall every client
+        loop = asyncio.get_running_loop()
+        paths = [request[k] for k in file_keys]
+        key, stamp, design = self.cache.lookup(job, *paths, depends=depends)
+        if design is None:
+            design = self.cache.insert(key, stamp, await loop.run_in_executor(None, parser, *paths))
+        if job == 'legalize' and request.get('base'):
+            legalizer = self.sessions.take(request['aux'], request['base'])
+            legalizer, result = await loop.run_in_executor(None, run_eco_job, design, legalizer, request)
+            if request.get('output'):
+                self.sessions.keep(request['aux'], request['output'], legalizer)
+        else:
+            result = await loop.run_in_executor(self.pool, worker, design, request)
+
+        await send({'event': 'summary', 'id': job_id, **result['summary']})
+        rows = result['blocks']
+        for i in range(0, len(rows), STREAM_CHUNK):
+            await send({'event': 'blocks', 'id': job_id, 'rows': rows[i:i + STREAM_CHUNK]})
+        await send({'event': 'done', 'id': job_id})
+
+    async def serve(self, socket_path:str = None, host:str = '127.0.0.1', port:int = None) -> None:
+        """Serve until a `shutdown` request arrives.
+
+        Args:
+            socket_path (str, optional): The Unix socket path. Defaults to None.
+            host (str, optional): The TCP host, used when `port` is given. Defaults to '127.0.0.1'.
+            port (int, optional): The TCP port. Defaults to None.
+        """
+        if port is not None:
+            self.server = await asyncio.start_server(self.handle, host, port)
+        else:
+            if os.path.exists(socket_path):
+                os.unlink(socket_path)
+            self.server = await asyncio.start_unix_server(self.handle, socket_path)
+        try:
+            async with self.server:
+                await self.server.wait_closed()
+        finally:
+            self.pool.shutdown()
+            if port is None and os.path.exists(socket_path):
+                os.unlink(socket_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Resident floorplanning service')
+    parser.add_argument('--socket', default=DEFAULT_SOCKET, help='Unix socket path')
+    parser.add_argument('--port', type=int, default=None, help='Serve on localhost TCP instead of a Unix socket')
+    parser.add_argument('--workers', type=int, default=None, help='Number of worker processes')
+    parser.add_argument('--cache-mb', type=int, default=DEFAULT_CACHE_MB, help='Memory budget of the design cache')
+    parser.add_argument('--eco-sessions', type=int, default=DEFAULT_ECO_SESSIONS, help='Number of warm ECO legalizers')
+    args = parser.parse_args()
+
+    server = FloorplanServer(workers=args.workers, cache_bytes=args.cache_mb << 20, eco_sessions=args.eco_sessions)
+    print(f'Floorplan server listening on {args.socket if args.port is None else f"127.0.0.1:{args.port}"}')
+    asyncio.run(server.serve(socket_path=args.socket, port=args.port))
+
+
+if __name__ == '__main__':
+    main()
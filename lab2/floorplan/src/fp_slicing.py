@@ -0,0 +1,622 @@
+'''
+Copyright (c) 2024 by Albresky, All Rights Reserved.
+
+Author: Albresky albre02@outlook.com
+Date: 2026-10-19 13:49:40
+LastEditTime: 2026-10-19 14:45:04
+FilePath: /EDA-assignments/lab2/floorplan/src/fp_slicing.py
+
+Description: Floorplanner based on normalized Polish expressions (slicing trees), with
+             Stockmeyer shape curves updated along the changed paths only.
+'''
+
+import random
+import math
+import numpy as np
+from fp_units import Outline, Terminal, Terminals, Block, Blocks, Nets
+from fp_verifier import verify_floorplan
+from fp_memo import CostCache, zobrist_key, DEFAULT_CACHE_SIZE
+from fp_quadratic import quadratic_centers, slicing_expression
+from fp_bounds import Bounds, optimality_gap
+
+H = -1  # horizontal cut, children stacked bottom to top
+V = -2  # vertical cut, children side by side from left to right
+
+
+class SlicingNode:
+    """Node of the slicing tree. Leaves hold a block index, internal nodes an operator.
+    `curve` is the shape curve: (width, height, left choice, right choice) points sorted
+    by increasing width and decreasing height. `pos` is the position of the token in the
+    expression, a node always comes after its children.
+    """
+    __slots__ = ('op', 'left', 'right', 'parent', 'pos', 'curve')
+
+    def __init__(self, op:int, left=None, right=None) -> None:
+        self.op = op
+        self.left = left
+        self.right = right
+        self.parent = None
+        self.pos = 0
+        self.curve = None
+
+
+def leaf_curve(width:int, height:int) -> list:
+    """Shape curve of a block, both orientations.
+
+    Args:
+        width (int): The block width.
+        height (int): The block height.
+
+    Returns:
+        list: The shape curve, the choice field tells whether the block is rotated.
+    """
+    if width == height:
+        return [(width, height, 0, 0)]
+    points = [(width, height, 0, 0), (height, width, 1, 0)]
+    points.sort()
+    return points
+
+
+def combine(op:int, a:list, b:list) -> list:
+    """Combine two shape curves with Stockmeyer's algorithm in O(len(a) + len(b)).
+
+    Args:
+        op (int): H or V.
+        a (list): The shape curve of the left child.
+        b (list): The shape curve of the right child.
+
+    Returns:
+        list: The shape curve of the parent, without dominated points.
+    """
+    points = []
+    if op == V:
+        # width adds up, height is the max: walk from the tallest points, advance the taller side
+        i, j = 0, 0
+        while i < len(a) and j < len(b):
+            points.append((a[i][0] + b[j][0], max(a[i][1], b[j][1]), i, j))
+            if a[i][1] > b[j][1]:
+                i += 1
+            elif a[i][1] < b[j][1]:
+                j += 1
+            else:
+                i += 1
+                j += 1
+    else:
+        # height adds up, width is the max: walk from the widest points, advance the wider side
+        i, j = len(a) - 1, len(b) - 1
+        while i >= 0 and j >= 0:
+            points.append((max(a[i][0], b[j][0]), a[i][1] + b[j][1], i, j))
+            if a[i][0] > b[j][0]:
+                i -= 1
+            elif a[i][0] < b[j][0]:
+                j -= 1
+            else:
+                i -= 1
+                j -= 1
+        points.reverse()
+
+    # Drop dominated points, keep widths increasing and heights decreasing
+    curve = []
+    for p in points:
+        if curve and p[0] == curve[-1][0]:
+            if p[1] < curve[-1][1]:
+                curve[-1] = p
+            continue
+        if curve and p[1] >= curve[-1][1]:
+            continue
+        curve.append(p)
+    return curve
+
+
+class SlicingFloorPlanner:
+    """The slicing floorplanner places the blocks by a normalized Polish expression and
+    optimizes it with simulated annealing using the M1/M2/M3 moves of Wong and Liu.
+    Block rotation is chosen by the shape curves, so no move rotates a block.
+    """
+    def __init__(self,
+                 outline:Outline,
+                 blocks:Blocks,
+                 terminals:Terminals,
+                 nets:Nets,
+                 temperature: int = 1000,
+                 alpha: float = 0.95,
+                 cooling: float = 0.95,
+                 moves: int = 10,
+                 cache_size: int = DEFAULT_CACHE_SIZE,
+                 gap_target: float = 0.0
+        ) -> None:
+        """The constructor of the slicing floorplanner.
+
+        Args:
+            outline (_type_): The Outline object.
+            blocks (Blocks): The Blocks object.
+            terminals (Terminals): The Terminals object.
+            nets (Nets): The Nets object.
+            temperature (int, optional): Parameter for simulated annealing. Defaults to 1000.
+            alpha (float, optional): Parameter for simulated annealing. Defaults to 0.95.
+            cooling (float, optional): The temperature ratio between two iterations. Defaults to 0.95.
+            moves (int, optional): Moves per block tried in every iteration. Defaults to 10.
+            cache_size (int, optional): The max number of evaluated expressions kept in the cost
+                cache during simulated annealing, 0 to disable it. Defaults to 65536.
+            gap_target (float, optional): Stop the simulated annealing once the best fitting cost is
+                within this relative gap of its lower bound, 0 to disable it. Defaults to 0.
+        """
+        self.outline = outline
+        self.blocks = blocks.get_units()
+        self.terminals = terminals.get_units()
+        self.nets = nets.get_units()
+        self.temperature = temperature
+        self.alpha = alpha
+        self.cooling = cooling
+        self.moves = moves
+        self.cost_cache = CostCache(cache_size) if cache_size > 0 else None
+        self.state_hash = None
+        self.best_cost = float('inf')
+        self.best_x = float('inf')
+        self.best_y = float('inf')
+        self.expr = []
+        self.root = None
+        self.leaves = {}
+        self.dims = [(b.width, b.height) if not b.rotated else (b.height, b.width) for b in self.blocks]
+        self.area_norm = sum(w * h for w, h in self.dims)
+        self.wirelen_norm = int(sum(0.5 * (w + h) for w, h in self.dims))
+        self.bounds = Bounds(outline, self.blocks, self.nets)
+        self.gap_target = gap_target
+        self.gap = float('inf')
+        self.iterations = 0
+        self.penalty_scale = 1
+        self.index_nets()
+
+    def initialize(self, seed:str = None) -> None:
+        """Initialize the Polish expression with rows of blocks that fit the outline width,
+        e.g. `0 1 V 2 V 3 4 V H`, then pack it. The rows are tried at several widths up to the
+        outline width, and when no packing fits the outline the expression is annealed on
+        the outline excess alone until it does.
+
+        Args:
+            seed (str, optional): 'quadratic' to bisect the spread quadratic placement into the
+                expression instead. Defaults to None.
+        """
+        if seed == 'quadratic':
+            cx, cy = quadratic_centers(self.outline, self.blocks, self.nets)
+            self.expr = slicing_expression(cx, cy, horizontal=self.outline.h > self.outline.w)
+            self.build()
+        elif seed is None:
+            best = None
+            for k in range(10, 0, -1):
+                self.expr = self.row_expression(self.outline.w * (0.5 + k / 20))
+                self.build()
+                key = self.excess(*self.root.curve[self.select_root_point()][:2])
+                if best is None or key < best[0]:
+                    best = (key, self.expr)
+            self.expr = best[1]
+            self.build()
+        else:
+            raise ValueError(f'Unknown seed {seed}')
+        if not self.is_within_outline():
+            self.fit_outline()
+        self.pack()
+
+    def row_expression(self, width:float) -> list:
+        """The expression of the blocks packed in rows of at most `width`, tallest first.
+        """
+        order = sorted(range(len(self.blocks)), key=lambda i: self.dims[i][1], reverse=True)
+        expr, row_width, rows = [], 0, 0
+        for k, i in enumerate(order):
+            w = min(self.dims[i])
+            if k > 0 and row_width + w > width:
+                if rows > 0:
+                    expr.append(H)
+                rows += 1
+                row_width = 0
+                expr.append(i)
+            else:
+                expr.append(i)
+                if row_width > 0:
+                    expr.append(V)
+            row_width += w
+        if rows > 0:
+            expr.append(H)
+        return expr
+
+    def fit_outline(self, max_moves:int = 200000) -> bool:
+        """Anneal the expression on the outline excess alone until it fits the outline.
+
+        Args:
+            max_moves (int, optional): The max moves tried. Defaults to 200000.
+
+        Returns:
+            bool: Whether the expression fits the outline.
+        """
+        excess = self.excess(*self.root.curve[self.select_root_point()][:2])
+        temperature = 0.01
+        for n in range(max_moves):
+            if excess == 0:
+                return True
+            move = self.perturb()
+            if move is None:
+                continue
+            new_excess = self.excess(*self.root.curve[self.select_root_point()][:2])
+            delta = new_excess - excess
+            if delta <= 0 or random.random() < math.exp(-delta / temperature):
+                excess = new_excess
+            else:
+                self.revert(move)
+            if n % len(self.expr) == 0:
+                temperature *= 0.99
+        return excess == 0
+
+    def build(self) -> None:
+        """Build the slicing tree of the current expression and all shape curves.
+        """
+        stack = []
+        self.leaves = {}
+        self.operators = {}
+        for k, token in enumerate(self.expr):
+            if token >= 0:
+                node = SlicingNode(token)
+                node.curve = leaf_curve(*self.dims[token])
+                self.leaves[k] = node
+            else:
+                right = stack.pop()
+                left = stack.pop()
+                node = SlicingNode(token, left, right)
+                left.parent = right.parent = node
+                node.curve = combine(token, left.curve, right.curve)
+                self.operators[k] = node
+            node.pos = k
+            stack.append(node)
+        self.root = stack.pop()
+        self.root.parent = None
+
+    def update(self, nodes:list) -> None:
+        """Recompute the shape curves on the paths from the given nodes to the root.
+
+        Args:
+            nodes (list): The changed nodes.
+        """
+        dirty = {}
+        for node in nodes:
+            while node is not None and id(node) not in dirty:
+                dirty[id(node)] = node
+                node = node.parent
+        for node in sorted(dirty.values(), key=lambda n: n.pos):
+            if node.left is None:
+                node.curve = leaf_curve(*self.dims[node.op])
+            else:
+                node.curve = combine(node.op, node.left.curve, node.right.curve)
+
+    def select_root_point(self) -> int:
+        """Pick the point of the root curve: the smallest area that fits the outline, or
+        the one with the smallest excess when none fits.
+
+        Returns:
+            int: The index of the point.
+        """
+        best, best_key = 0, None
+        for k, (w, h, _, _) in enumerate(self.root.curve):
+            excess = max(w - self.outline.w, 0) * h + max(h - self.outline.h, 0) * w
+            key = (excess, w * h)
+            if best_key is None or key < best_key:
+                best, best_key = k, key
+        return best
+
+    def pack(self) -> None:
+        """Assign the block positions and orientations from the chosen root point.
+        """
+        stack = [(self.root, self.select_root_point(), 0, 0)]
+        while stack:
+            node, k, x, y = stack.pop()
+            w, h, ci, cj = node.curve[k]
+            if node.left is None:
+                block = self.blocks[node.op]
+                block.x, block.y = x, y
+                self.xl[node.op], self.yl[node.op] = x, y
+                self.xh[node.op], self.yh[node.op] = x + w, y + h
+                block.width, block.height = w, h
+                block.rotated = (w, h) != self.dims[node.op]
+                block.placed = True
+            else:
+                stack.append((node.left, ci, x, y))
+                lw, lh = node.left.curve[ci][0], node.left.curve[ci][1]
+                if node.op == V:
+                    stack.append((node.right, cj, x + lw, y))
+                else:
+                    stack.append((node.right, cj, x, y + lh))
+
+    def is_within_outline(self) -> bool:
+        w, h = self.root.curve[self.select_root_point()][:2]
+        return w <= self.outline.w and h <= self.outline.h
+
+    def excess(self, width:int, height:int) -> float:
+        """The relative excess of a packing over the outline, 0 when it fits.
+        """
+        return max(width - self.outline.w, 0) / self.outline.w + max(height - self.outline.h, 0) / self.outline.h
+
+    def perturb(self) -> tuple:
+        """Apply a random M1, M2 or M3 move to the expression.
+
+        Returns:
+            tuple: The information needed to revert the move, None if no move applied.
+        """
+        expr = self.expr
+        if len(self.blocks) < 2:
+            return None
+        magic = random.randint(0, 2)
+        if magic == 0:
+            # M1: swap two operands, any pair rather than adjacent ones only, which mixes much faster
+            operands = [k for k, t in enumerate(expr) if t >= 0]
+            i, j = random.sample(operands, 2)
+            self.swap_operands(i, j)
+            return ('M1', i, j)
+        elif magic == 1:
+            # M2: complement an operator chain
+            operators = [k for k, t in enumerate(expr) if t < 0]
+            k = random.choice(operators)
+            while k > 0 and expr[k - 1] < 0:
+                k -= 1
+            chain = []
+            while k < len(expr) and expr[k] < 0:
+                chain.append(k)
+                k += 1
+            self.complement(chain)
+            return ('M2', chain)
+        else:
+            # M3: swap an adjacent operand and operator, keeping the expression normalized
+            candidates = [k for k in range(len(expr) - 1) if (expr[k] >= 0) != (expr[k + 1] >= 0)]
+            random.shuffle(candidates)
+            for k in candidates:
+                new = expr[:k] + [expr[k + 1], expr[k]] + expr[k + 2:]
+                if self.is_normalized(new):
+                    self.swap_adjacent(k)
+                    return ('M3', k)
+            return None
+
+    def swap_operands(self, i:int, j:int) -> None:
+        expr = self.expr
+        self.rekey((i, j))
+        expr[i], expr[j] = expr[j], expr[i]
+        self.rekey((i, j))
+        a, b = self.leaves[i], self.leaves[j]
+        a.op, b.op = expr[i], expr[j]
+        self.update([a, b])
+
+    def complement(self, chain:list) -> None:
+        nodes = []
+        self.rekey(chain)
+        for k in chain:
+            self.expr[k] = H if self.expr[k] == V else V
+            node = self.operators[k]
+            node.op = self.expr[k]
+            nodes.append(node)
+        self.rekey(chain)
+        self.update(nodes)
+
+    def swap_adjacent(self, k:int) -> None:
+        """Swap the operand and the operator at positions k and k + 1, and re-link the two
+        nodes in place. The stack of the postfix evaluation after k + 1 keeps its depth, so
+        the later operators take the same slots with `X P` replaced by `P' a` or back.
+        """
+        expr = self.expr
+        self.rekey((k, k + 1))
+        if expr[k] >= 0:
+            # a P -> P' a: P(L, a) becomes P'(X, L), X being the subtree just before L
+            a, p = self.leaves.pop(k), self.operators.pop(k + 1)
+            node = p
+            while node.parent.right is not node:
+                node = node.parent
+            grand = node.parent
+            x, pp = grand.left, p.parent
+            self.relink(pp, p, a)
+            self.relink(grand, x, p)
+            p.left, p.right = x, p.left
+            x.parent = p
+            self.operators[k], self.leaves[k + 1] = p, a
+            p.pos, a.pos = k, k + 1
+        else:
+            # P a -> a P': P(X, L) becomes P'(L, a), X takes the slot of P, P the slot of a
+            p, a = self.operators.pop(k), self.leaves.pop(k + 1)
+            x, pp, pa = p.left, p.parent, a.parent
+            self.relink(pp, p, x)
+            self.relink(pa, a, p)
+            p.left, p.right = p.right, a
+            a.parent = p
+            self.leaves[k], self.operators[k + 1] = a, p
+            a.pos, p.pos = k, k + 1
+        expr[k], expr[k + 1] = expr[k + 1], expr[k]
+        self.rekey((k, k + 1))
+        self.update([p, a])
+
+    @staticmethod
+    def relink(parent:SlicingNode, old:SlicingNode, new:SlicingNode) -> None:
+        """Put `new` in the child slot of `parent` that holds `old`.
+        """
+        if parent.left is old:
+            parent.left = new
+        else:
+            parent.right = new
+        new.parent = parent
+
+    def rekey(self, positions) -> None:
+        """XOR the Zobrist keys of the tokens at the given positions into the state hash,
+        once before and once after changing them.
+        """
+        if self.state_hash is not None:
+            for k in positions:
+                self.state_hash ^= zobrist_key(k, self.expr[k])
+
+    def rehash(self) -> None:
+        """Recompute the state hash of the whole expression. Does nothing when the cost
+        cache is disabled.
+        """
+        if self.cost_cache is None:
+            return
+        self.state_hash = 0
+        self.rekey(range(len(self.expr)))
+
+    @staticmethod
+    def is_normalized(expr:list) -> bool:
+        """Check the balloting property and that no two identical operators are adjacent.
+        """
+        operands = 0
+        for k, token in enumerate(expr):
+            if token >= 0:
+                operands += 1
+            else:
+                if 2 * (k + 1 - operands) >= k + 1:
+                    return False
+                if k > 0 and expr[k - 1] == token:
+                    return False
+        return True
+
+    def revert(self, move:tuple) -> None:
+        """Revert a move returned by `perturb`.
+        """
+        if move[0] == 'M1':
+            self.swap_operands(move[1], move[2])
+        elif move[0] == 'M2':
+            self.complement(move[1])
+        else:
+            self.swap_adjacent(move[1])
+
+    def calculate_cost(self) -> tuple:
+        """The cost of the floorplan, same terms and normalization as `FloorPlanner`. The
+        annealing adds `penalty` on top of it.
+
+        Returns:
+            tuple: The cost, width, height, area and wirelength of current floorplan.
+        """
+        # Expressions seen before during simulated annealing are served from the cost cache,
+        # the blocks are packed again once the annealing is over
+        if self.state_hash is not None:
+            cached = self.cost_cache.get(self.state_hash)
+            if cached is not None:
+                return cached
+
+        self.pack()
+        max_x, max_y = self.root.curve[self.select_root_point()][:2]
+        area = max_x * max_y
+        wire_len = self.calculate_wirelength()
+        cost = self.alpha * area / self.area_norm + (1 - self.alpha) * wire_len / self.wirelen_norm
+        result = (cost, max_x, max_y, area, wire_len)
+        if self.state_hash is not None:
+            self.cost_cache.put(self.state_hash, result)
+        return result
+
+    def penalty(self, width:int, height:int) -> float:
+        """The penalty of the annealing cost when the packing exceeds the outline, scaled
+        by the cost of the initial expression.
+        """
+        return 10 * self.penalty_scale * self.excess(width, height)
+
+    def index_nets(self) -> None:
+        """Flatten the block pins of all nets into index arrays, and reduce the terminals
+        of every net to a fixed bounding box, so the wirelength is a few array reductions.
+        """
+        index = {id(b): i for i, b in enumerate(self.blocks)}
+        pins, starts, boxes, fixed = [], [], [], 0
+        for net in self.nets:
+            blocks = [index[id(n)] for n in net.get_nodes() if isinstance(n, Block) and id(n) in index]
+            terms = [(n.x, n.y) for n in net.get_nodes() if isinstance(n, Terminal)]
+            box = (min(t[0] for t in terms), min(t[1] for t in terms), max(t[0] for t in terms), max(t[1] for t in terms)) \
+                if terms else (float('inf'), float('inf'), float('-inf'), float('-inf'))
+            if blocks:
+                starts.append(len(pins))
+                pins.extend(blocks)
+                boxes.append(box)
+            elif terms:
+                fixed += (box[2] - box[0]) + (box[3] - box[1])
+        self.pins = np.array(pins, dtype=np.int64)
+        self.net_starts = np.array(starts, dtype=np.int64)
+        self.term_box = np.array(boxes, dtype=np.float64).reshape(-1, 4).T
+        self.term_wirelen = fixed
+        n = len(self.blocks)
+        self.xl, self.yl, self.xh, self.yh = np.zeros(n), np.zeros(n), np.zeros(n), np.zeros(n)
+
+    def calculate_wirelength(self) -> int:
+        """Calculate the half-perimeter wirelength of the floorplan, a block pin spans the
+        whole block as in `FloorPlanner`.
+
+        Returns:
+            int: The wirelength of the floorplan.
+        """
+        if not len(self.pins):
+            return int(self.term_wirelen)
+        min_x = np.minimum(np.minimum.reduceat(self.xl[self.pins], self.net_starts), self.term_box[0])
+        min_y = np.minimum(np.minimum.reduceat(self.yl[self.pins], self.net_starts), self.term_box[1])
+        max_x = np.maximum(np.maximum.reduceat(self.xh[self.pins], self.net_starts), self.term_box[2])
+        max_y = np.maximum(np.maximum.reduceat(self.yh[self.pins], self.net_starts), self.term_box[3])
+        return int((max_x - min_x).sum() + (max_y - min_y).sum() + self.term_wirelen)
+
+    def simulate_annealing(self,
+                           max_iterations:int = 1000
+        ) -> None:
+        """Optimize the Polish expression by simulated annealing, every iteration tries `moves`
+        moves per block and then cools down by `cooling`. The best expression that fits the
+        outline is restored at the end. The annealing stops early once the optimality gap of
+        the best fitting expression reaches `gap_target`.
+
+        Args:
+            max_iterations (int, optional): The max iterations of the simulated annealing. Defaults to 1000.
+        """
+        self.rehash()
+        cost, max_x, max_y, _, _ = self.calculate_cost()
+        best_expr = list(self.expr) if self.is_within_outline() else None
+        best_cost = cost if best_expr else float('inf')
+        self.penalty_scale = cost
+        cost += self.penalty(max_x, max_y)
+        recent_costs = []
+        cost_bound = self.bounds.cost(self.alpha, self.area_norm, self.wirelen_norm)
+        print(self.bounds.report())
+
+        for i in range(max_iterations):
+            self.iterations = i + 1
+            for _ in range(self.moves * len(self.blocks)):
+                move = self.perturb()
+                if move is None:
+                    continue
+                new_cost, max_x, max_y, _, _ = self.calculate_cost()
+                excess = self.penalty(max_x, max_y)
+                delta = new_cost + excess - cost
+                if delta < 0 or self.temperature == 0 or random.random() < math.exp(-delta / self.temperature):
+                    cost = new_cost + excess
+                    if new_cost < best_cost and excess == 0:
+                        best_cost, best_expr = new_cost, list(self.expr)
+                else:
+                    self.revert(move)
+            self.temperature *= self.cooling
+
+            self.gap = optimality_gap(best_cost, cost_bound)
+            if self.gap_target and self.gap <= self.gap_target:
+                print(f"SA has reached gap {self.gap:.2%} at iteration {i} with cost {best_cost}")
+                break
+            recent_costs.append(best_cost)
+            if len(recent_costs) > 10:
+                recent_costs.pop(0)
+            if self.temperature < 1e-3 and len(recent_costs) == 10 and abs(sum(recent_costs) - recent_costs[0]*10) < 1e-9:
+                print(f"SA has converged at iteration {i} with cost {best_cost}")
+                break
+            print(f"SA[{i}] Cost={best_cost} Gap={self.gap:.2%}")
+
+        self.state_hash = None
+        if best_expr is not None:
+            self.expr = best_expr
+            self.build()
+        else:
+            print(f'SA found no expression within the outline {self.outline.w}x{self.outline.h}, the floorplan is illegal')
+        self.best_cost, self.best_x, self.best_y, _, _ = self.calculate_cost()
+        self.gap = optimality_gap(self.best_cost, cost_bound)
+        if self.cost_cache is not None:
+            print(self.cost_cache.report())
+        print(f'SA finished, {len(self.blocks)}')
+
+    def check_valid_all(self) -> bool:
+        """Check if all blocks are valid within the outline and do not overlap with each other.
+
+        Returns:
+            bool: Whether all blocks are valid.
+        """
+        result = verify_floorplan(self.outline, self.blocks)
+        if not result.is_valid:
+            print(result.report())
+        return result.is_valid
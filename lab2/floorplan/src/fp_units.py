@@ -74,7 +74,10 @@ class Net:
         return self.nodes
         
 class Units:
-    def __init__(self, units:list=[], num_units:int=0) -> None:
+    def __init__(self, units:list=None, num_units:int=0) -> None:
+        # 每个实例持有独立的列表, 避免多次解析时共享默认参数
+        if units is None:
+            units = []
         if len(units) != num_units:
             raise ValueError(f'Length of units {len(units)} does not match num_units {num_units}')
         
@@ -89,13 +92,13 @@ class Units:
         return self.units
 
 class Nets(Units):
-    def __init__(self, nets:list=[], num_nets:int=0) -> None:
+    def __init__(self, nets:list=None, num_nets:int=0) -> None:
         super().__init__(nets, num_nets)
 
 class Blocks(Units):
-    def __init__(self, blocks:list=[], num_blocks:int=0) -> None:
+    def __init__(self, blocks:list=None, num_blocks:int=0) -> None:
         super().__init__(blocks, num_blocks)
         
 class Terminals(Units):
-    def __init__(self, terminals:list=[], num_terminals:int=0) -> None:
+    def __init__(self, terminals:list=None, num_terminals:int=0) -> None:
         super().__init__(terminals, num_terminals)
@@ -25,6 +25,38 @@ def load_config(filename:str) -> dict:
         config = json.load(f)
     return config
 
+def create_floorplanner(engine:str, outline, blocks, terminals, nets, sa_params:dict):
+    """Create the floorplanner of the given engine.
+
+    Args:
+        engine (str): 'bstar' for `FloorPlanner`, 'slicing' for `SlicingFloorPlanner`.
+        outline, blocks, terminals, nets: The parsed design.
+        sa_params (dict): The `sa_params` of the configuration.
+
+    Returns:
+        object: The floorplanner, both engines share the same interface.
+    """
+    from fp_memo import DEFAULT_CACHE_SIZE
+
+    if engine == 'bstar':
+        from fp_floorplanner import FloorPlanner
+        return FloorPlanner(outline, blocks, terminals, nets,
+                            temperature=sa_params.get('temperature', 1000),
+                            alpha=sa_params.get('alpha', 0.95),
+                            compact_every=sa_params.get('compact_every', 0),
+                            cache_size=sa_params.get('cache_size', DEFAULT_CACHE_SIZE),
+                            gap_target=sa_params.get('gap_target', 0.0))
+    if engine == 'slicing':
+        from fp_slicing import SlicingFloorPlanner
+        return SlicingFloorPlanner(outline, blocks, terminals, nets,
+                                   temperature=sa_params.get('temperature', 1000),
+                                   alpha=sa_params.get('alpha', 0.95),
+                                   cooling=sa_params.get('cooling', 0.95),
+                                   moves=sa_params.get('moves', 10),
+                                   cache_size=sa_params.get('cache_size', DEFAULT_CACHE_SIZE),
+                                   gap_target=sa_params.get('gap_target', 0.0))
+    raise ValueError(f'Unknown engine {engine}')
+
 def visualize(filename:str) -> None:
     import matplotlib 
     import matplotlib.pyplot as plt 
@@ -33,12 +65,6 @@ def visualize(filename:str) -> None:
 
     ax = fig.add_subplot(111)
     
-    node_names = []
-    x_cor = []
-    y_cor = []
-    width = []
-    height = []
-
     colors = []
     
     def sel_color(colors) -> str:
@@ -53,21 +79,15 @@ def visualize(filename:str) -> None:
             return sel_color(colors)
     
 
-    with open(filename) as f:
-        next(f)
-        next(f)
-        next(f)
-        xlength = int(f.readline().split(' ')[-1])
-        ylength = int(f.readline().split(' ')[-1])
-        next(f)
-
-        for line in f.readlines():
-            s = line.split(' ')
-            node_names.append(str(s[0]))
-            x_cor.append(float(s[1]))
-            y_cor.append(float(s[2]))
-            width.append(float(s[3])-float(s[1]))
-            height.append(float(s[4])-float(s[2]))
+    from fp_writer import read_output
+
+    header, node_names, coords = read_output(filename)
+    xlength = int(header['Width'])
+    ylength = int(header['Height'])
+    x_cor = coords[:, 0].tolist()
+    y_cor = coords[:, 1].tolist()
+    width = (coords[:, 2] - coords[:, 0]).tolist()
+    height = (coords[:, 3] - coords[:, 1]).tolist()
 
 
     for x,y,w,h,n in zip(x_cor, y_cor, width, height, node_names):
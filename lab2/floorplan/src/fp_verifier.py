@@ -0,0 +1,210 @@
+'''
+Copyright (c) 2024 by Albresky, All Rights Reserved.
+
+Author: Albresky albre02@outlook.com
+Date: 2026-10-19 13:17:38
+LastEditTime: 2026-10-19 14:44:33
+FilePath: /EDA-assignments/lab2/floorplan/src/fp_verifier.py
+
+Description: Sweep-line legality verifier, detects overlaps with an interval tree
+             and outline violations in O(n log n + k).
+'''
+
+import numpy as np
+
+
+class IntervalTree:
+    """Interval tree over a fixed set of intervals, each interval can be activated or
+    deactivated during a sweep. Leaves are sorted by the low end, every node keeps the
+    minimum low end of its subtree and the maximum high end of its active intervals,
+    so a query only descends into subtrees that may intersect.
+    """
+    def __init__(self, lows, highs) -> None:
+        """The constructor of the interval tree.
+
+        Args:
+            lows (array-like): The low ends of all intervals.
+            highs (array-like): The high ends of all intervals.
+        """
+        n = len(lows)
+        size = 1
+        while size < max(n, 1):
+            size <<= 1
+        order = np.argsort(lows, kind='stable')
+
+        self.size = size
+        self.highs = [float(h) for h in highs]
+        self.ids = [-1] * size
+        self.pos = [0] * n
+        self.min_low = [float('inf')] * (2 * size)
+        self.max_high = [float('-inf')] * (2 * size)
+        for leaf, i in enumerate(order.tolist()):
+            self.ids[leaf] = i
+            self.pos[i] = leaf
+            self.min_low[size + leaf] = float(lows[i])
+        for node in range(size - 1, 0, -1):
+            self.min_low[node] = min(self.min_low[2 * node], self.min_low[2 * node + 1])
+
+    def _update(self, node:int, value:float) -> None:
+        max_high = self.max_high
+        max_high[node] = value
+        node >>= 1
+        while node:
+            value = max(max_high[2 * node], max_high[2 * node + 1])
+            if max_high[node] == value:
+                break
+            max_high[node] = value
+            node >>= 1
+
+    def insert(self, i:int) -> None:
+        self._update(self.size + self.pos[i], self.highs[i])
+
+    def remove(self, i:int) -> None:
+        self._update(self.size + self.pos[i], float('-inf'))
+
+    def query(self, low:float, high:float) -> list:
+        """Find the active intervals overlapping the open interval (low, high).
+
+        Returns:
+            list: The ids of the overlapping intervals.
+        """
+        found = []
+        min_low, max_high, size = self.min_low, self.max_high, self.size
+        stack = [1]
+        while stack:
+            node = stack.pop()
+            if max_high[node] <= low or min_low[node] >= high:
+                continue
+            if node >= size:
+                found.append(self.ids[node - size])
+            else:
+                stack.append(2 * node)
+                stack.append(2 * node + 1)
+        return found
+
+
+def find_overlaps(xl, yl, xh, yh, skip=None) -> list:
+    """Find all overlapping pairs of rectangles with a sweep line along x. Rectangles
+    touching at an edge do not overlap, and rectangles of zero width or height overlap
+    nothing.
+
+    Args:
+        xl, yl, xh, yh (array-like): The lower-left and upper-right corners.
+        skip (array-like, optional): Boolean mask, pairs where both rectangles are
+            masked are ignored (e.g. fixed macros). Defaults to None.
+
+    Returns:
+        list: The overlapping pairs (i, j) as indices into the inputs.
+    """
+    xl = np.asarray(xl, dtype=np.float64)
+    xh = np.asarray(xh, dtype=np.float64)
+    yl = np.asarray(yl, dtype=np.float64)
+    yh = np.asarray(yh, dtype=np.float64)
+    # Degenerate rectangles would be removed before they are inserted at the same x
+    keep = np.flatnonzero((xl < xh) & (yl < yh))
+    if len(keep) < len(xl):
+        skip = None if skip is None else np.asarray(skip, dtype=bool)[keep]
+        return [(int(keep[i]), int(keep[j])) for i, j in find_overlaps(xl[keep], yl[keep], xh[keep], yh[keep], skip)]
+    n = len(xl)
+    if n < 2:
+        return []
+
+    # Events sorted by x, removals before insertions at the same x
+    ids = np.arange(n)
+    coords = np.concatenate([xh, xl])
+    kinds = np.concatenate([np.zeros(n, dtype=np.int8), np.ones(n, dtype=np.int8)])
+    order = np.lexsort((kinds, coords))
+    event_ids = np.concatenate([ids, ids])[order].tolist()
+    event_kinds = kinds[order].tolist()
+
+    tree = IntervalTree(yl, yh)
+    ylo, yhi = yl.tolist(), yh.tolist()
+    skip = None if skip is None else np.asarray(skip, dtype=bool).tolist()
+    pairs = []
+    for i, kind in zip(event_ids, event_kinds):
+        if kind == 0:
+            tree.remove(i)
+            continue
+        for j in tree.query(ylo[i], yhi[i]):
+            if skip is None or not (skip[i] and skip[j]):
+                pairs.append((j, i) if j < i else (i, j))
+        tree.insert(i)
+    return pairs
+
+
+class VerifyResult:
+    """Structured result of a legality check.
+    """
+    def __init__(self, names:list) -> None:
+        self.names = names
+        self.overlaps = []
+        self.outside = []
+        self.unplaced = []
+        self.misaligned = []
+        self.over_displaced = []
+        self.max_displacement = 0.0
+        self.total_displacement = 0.0
+        self.runtime = 0.0
+
+    @property
+    def is_valid(self) -> bool:
+        return not (self.overlaps or self.outside or self.unplaced or self.misaligned or self.over_displaced)
+
+    def to_dict(self) -> dict:
+        name = lambda i: self.names[i]
+        return {
+            'valid': self.is_valid,
+            'overlaps': [(name(i), name(j)) for i, j in self.overlaps],
+            'outside': [name(i) for i in self.outside],
+            'unplaced': [name(i) for i in self.unplaced],
+            'misaligned': [name(i) for i in self.misaligned],
+            'over_displaced': [name(i) for i in self.over_displaced],
+            'max_displacement': self.max_displacement,
+            'total_displacement': self.total_displacement,
+            'runtime': self.runtime,
+        }
+
+    def report(self, limit:int = 10) -> str:
+        """Format a short human readable report.
+
+        Args:
+            limit (int, optional): Max number of listed items per violation kind. Defaults to 10.
+
+        Returns:
+            str: The report.
+        """
+        lines = [f"Valid={self.is_valid} Overlaps={len(self.overlaps)} Outside={len(self.outside)} "
+                 f"Unplaced={len(self.unplaced)} Misaligned={len(self.misaligned)} "
+                 f"OverDisplaced={len(self.over_displaced)} RunTime={self.runtime:.3f}s"]
+        for i, j in self.overlaps[:limit]:
+            lines.append(f'  Overlap between {self.names[i]} and {self.names[j]}')
+        for kind in ('outside', 'unplaced', 'misaligned', 'over_displaced'):
+            for i in getattr(self, kind)[:limit]:
+                lines.append(f'  Block {self.names[i]} is {kind.replace("_", " ")}')
+        return '\n'.join(lines)
+
+
+def verify_floorplan(outline, blocks:list) -> VerifyResult:
+    """Verify a floorplan: every block is placed, inside the outline and overlap free.
+
+    Args:
+        outline (Outline): The Outline object.
+        blocks (list): The list of Block objects.
+
+    Returns:
+        VerifyResult: The structured result.
+    """
+    import time
+
+    start_time = time.time()
+    result = VerifyResult([b.name for b in blocks])
+    xl = np.array([b.x for b in blocks], dtype=np.float64)
+    yl = np.array([b.y for b in blocks], dtype=np.float64)
+    xh = xl + np.array([b.width for b in blocks], dtype=np.float64)
+    yh = yl + np.array([b.height for b in blocks], dtype=np.float64)
+
+    result.unplaced = [i for i, b in enumerate(blocks) if not b.placed]
+    result.outside = np.flatnonzero((xl < 0) | (yl < 0) | (xh > outline.w) | (yh > outline.h)).tolist()
+    result.overlaps = find_overlaps(xl, yl, xh, yh)
+    result.runtime = time.time() - start_time
+    return result
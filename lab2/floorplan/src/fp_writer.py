@@ -0,0 +1,199 @@
+'''
+Copyright (c) 2024 by Albresky, All Rights Reserved.
+
+Author: Albresky albre02@outlook.com
+Date: 2026-10-19 13:25:22
+LastEditTime: 2026-10-19 14:24:03
+FilePath: /EDA-assignments/lab2/floorplan/src/fp_writer.py
+
+Description: Buffered bulk writers for .output and Bookshelf .pl results, and a streaming
+             displacement pass between two .pl files.
+'''
+
+import numpy as np
+from itertools import zip_longest
+
+CHUNK_ROWS = 1 << 16
+BUFFER_BYTES = 1 << 20
+OUTPUT_HEADER = ('Cost', 'Wirelength', 'Area', 'Width', 'Height', 'RunTime', 'Gap')
+
+
+def _as_list(column) -> list:
+    if isinstance(column, np.ndarray):
+        if column.dtype.kind == 'S':
+            return np.char.decode(column).tolist()
+        return column.tolist()
+    return list(column)
+
+
+def _write_rows(f, fmt:str, columns:list) -> None:
+    """Format the rows chunk by chunk, each chunk goes out with one write call.
+
+    Args:
+        f (file): The file opened for writing.
+        fmt (str): The %-format of one row, including the newline.
+        columns (list): The columns, arrays or lists of the same length.
+    """
+    n = len(columns[0]) if columns else 0
+    for start in range(0, n, CHUNK_ROWS):
+        chunk = [_as_list(c[start:start + CHUNK_ROWS]) for c in columns]
+        f.write(''.join([fmt % row for row in zip(*chunk)]))
+
+
+def write_output(filename:str, header:dict, names, xl, yl, xh, yh) -> None:
+    """Write a result in the .output format: `key value` header lines followed by
+    `name x1 y1 x2 y2` per block.
+
+    Args:
+        filename (str): The path of the .output file.
+        header (dict): The header values, written in order.
+        names (array-like): The block names.
+        xl, yl, xh, yh (array-like): The lower-left and upper-right corners.
+    """
+    with open(filename, 'w', buffering=BUFFER_BYTES) as f:
+        f.write(''.join(f'{key} {value}\n' for key, value in header.items()))
+        _write_rows(f, '%s %s %s %s %s\n', [names, xl, yl, xh, yh])
+
+
+def write_floorplan(filename:str,
+                    floorplanner,
+                    cost:float,
+                    wirelength:int,
+                    area:int,
+                    runtime:float
+    ) -> None:
+    """Write the result of a floorplanner into the .output file, the `Gap` header line is
+    the optimality gap of the final cost above its lower bound.
+
+    Args:
+        filename (str): The path of the .output file.
+        floorplanner (FloorPlanner): The floorplanner holding the final placement.
+        cost (float): The final cost.
+        wirelength (int): The final wirelength.
+        area (int): The final area.
+        runtime (float): The runtime in seconds.
+    """
+    blocks = floorplanner.blocks
+    header = dict(zip(OUTPUT_HEADER, (cost, wirelength, area, floorplanner.best_x, floorplanner.best_y, runtime,
+                                      floorplanner.gap)))
+    write_output(filename, header,
+                 [b.name for b in blocks],
+                 [b.x for b in blocks],
+                 [b.y for b in blocks],
+                 [b.x + b.width for b in blocks],
+                 [b.y + b.height for b in blocks])
+
+
+def read_output(filename:str) -> tuple:
+    """Read a .output file in one pass.
+
+    Args:
+        filename (str): The path of the .output file.
+
+    Returns:
+        tuple: The header dict, the block names and an (n, 4) array of x1, y1, x2, y2.
+    """
+    header = {}
+    names, coords = [], []
+    with open(filename, 'r') as f:
+        lines = f.read().split('\n')
+    for line in lines:
+        parts = line.split()
+        if len(parts) == 2:
+            header[parts[0]] = float(parts[1])
+        elif len(parts) == 5:
+            names.append(parts[0])
+            coords.append(parts[1:])
+    return header, names, np.array(coords, dtype=np.float64).reshape(-1, 4)
+
+
+def write_pl(filename:str, names, xs, ys, orients=None, fixed=None) -> None:
+    """Write a placement into a Bookshelf .pl file.
+
+    Args:
+        filename (str): The path of the .pl file.
+        names (array-like): The node names.
+        xs, ys (array-like): The coordinates.
+        orients (array-like, optional): The orientations. Defaults to 'N'.
+        fixed (array-like, optional): Mask of the /FIXED nodes. Defaults to None.
+    """
+    n = len(names)
+    if orients is None:
+        orients = ['N'] * n
+    suffix = [''] * n if fixed is None else np.where(np.asarray(fixed, dtype=bool), ' /FIXED', '')
+    with open(filename, 'w', buffering=BUFFER_BYTES) as f:
+        f.write('UCLA pl 1.0\n\n')
+        _write_rows(f, '%s %.10g %.10g : %s%s\n', [names, xs, ys, orients, suffix])
+
+
+def _read_pl_chunks(filename:str):
+    """Yield (names, xs, ys) of a .pl file in chunks of CHUNK_ROWS lines, so two files
+    with the same node order stay aligned chunk by chunk."""
+    from itertools import islice
+
+    with open(filename, 'rb', buffering=BUFFER_BYTES) as f:
+        while True:
+            lines = list(islice(f, CHUNK_ROWS))
+            if not lines:
+                return
+            rows = [p for p in (line.split() for line in lines) if len(p) >= 3 and p[0] != b'UCLA' and not p[0].startswith(b'#')]
+            if rows:
+                yield ([p[0] for p in rows],
+                       np.array([p[1] for p in rows], dtype=np.float64),
+                       np.array([p[2] for p in rows], dtype=np.float64))
+
+
+def displacement_stats(output_pl:str, input_pl:str, max_displacement:float = float('inf')) -> dict:
+    """Compare an output .pl against the input .pl in one streaming pass. Both files are
+    read chunk by chunk in lockstep; entries that do not line up by name wait in a small
+    pending table until their counterpart shows up.
+
+    Args:
+        output_pl (str): The result .pl file.
+        input_pl (str): The initial .pl file.
+        max_displacement (float, optional): Threshold for the violation count. Defaults to inf.
+
+    Returns:
+        dict: Count, total, mean and max (Manhattan) displacement, the name of the most
+        displaced node and the number of nodes over max_displacement.
+    """
+    stats = {'count': 0, 'total': 0.0, 'max': 0.0, 'max_node': None, 'over': 0, 'unmatched': 0}
+    pending_out, pending_in = {}, {}
+
+    def account(names, disp) -> None:
+        if not len(disp):
+            return
+        k = int(np.argmax(disp))
+        stats['count'] += len(disp)
+        stats['total'] += float(disp.sum())
+        stats['over'] += int((disp > max_displacement).sum())
+        if disp[k] > stats['max']:
+            stats['max'], stats['max_node'] = float(disp[k]), names[k].decode()
+
+    # A file with more chunks than the other is paired with empty chunks, its extra rows go pending
+    empty = ([], np.zeros(0), np.zeros(0))
+    for out_chunk, in_chunk in zip_longest(_read_pl_chunks(output_pl), _read_pl_chunks(input_pl), fillvalue=empty):
+        (on, ox, oy), (iname, ix, iy) = out_chunk, in_chunk
+        m = min(len(on), len(iname))
+        head = np.array(on[:m], dtype=object)
+        same = head == np.array(iname[:m], dtype=object)
+        account(head[same], (np.abs(ox[:m] - ix[:m]) + np.abs(oy[:m] - iy[:m]))[same])
+        for k in np.flatnonzero(~same).tolist() + list(range(m, len(on))):
+            pending_out[on[k]] = (ox[k], oy[k])
+        for k in np.flatnonzero(~same).tolist() + list(range(m, len(iname))):
+            pending_in[iname[k]] = (ix[k], iy[k])
+        for name in [name for name in pending_out if name in pending_in]:
+            (a, b), (c, d) = pending_out.pop(name), pending_in.pop(name)
+            account([name], np.array([abs(a - c) + abs(b - d)]))
+
+    stats['unmatched'] = len(pending_out) + len(pending_in)
+    stats['mean'] = stats['total'] / stats['count'] if stats['count'] else 0.0
+    return stats
+
+
+if __name__ == '__main__':
+    import sys
+
+    ######## Test displacement_stats ########
+    if len(sys.argv) >= 3:
+        print(displacement_stats(sys.argv[1], sys.argv[2], float(sys.argv[3]) if len(sys.argv) > 3 else float('inf')))
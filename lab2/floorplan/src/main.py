@@ -19,8 +19,8 @@ os.chdir(sys.path[0])
 import time, datetime
 from fp_parser import parse_dotnet, parse_dotblock
 from fp_units import Blocks, Nets, Terminals
-from fp_floorplanner import FloorPlanner
-from fp_utils import load_config, visualize
+from fp_utils import load_config, create_floorplanner, visualize
+from fp_writer import write_floorplan
 
 def main():
     cfg = load_config('./config.json')
@@ -30,8 +30,8 @@ def main():
     nets = parse_dotnet(cfg['file']['nets'], blocks, terminals)
 
     # 初始化 FloorPlanner
-    floorplanner = FloorPlanner(outline, blocks, terminals, nets, temperature=cfg['sa_params']['temperature'], alpha=cfg['sa_params']['alpha'])
-    floorplanner.initialize()
+    floorplanner = create_floorplanner(cfg.get('engine', 'bstar'), outline, blocks, terminals, nets, cfg['sa_params'])
+    floorplanner.initialize(seed=cfg.get('seed'))
 
     # 优化
     floorplanner.simulate_annealing(max_iterations=cfg['sa_params']['iterations'])
@@ -45,15 +45,7 @@ def main():
 
     # 输出结果
     output_name = f'output/floorplan_{datetime.datetime.now().strftime("%Y-%m-%d-%H:%M:%S")}.output'
-    with open(output_name, 'w') as f:
-        f.write(f"Cost {cost}\n")
-        f.write(f"Wirelength {wirelength}\n")
-        f.write(f"Area {area}\n")
-        f.write(f"Width {floorplanner.best_x}\n")
-        f.write(f"Height {floorplanner.best_y}\n")
-        f.write(f"RunTime {end_time - start_time}\n")
-        for block in floorplanner.blocks:
-            f.write(f"{block.name} {block.x} {block.y} {block.x + block.width} {block.y + block.height}\n")
+    write_floorplan(output_name, floorplanner, cost, wirelength, area, end_time - start_time)
     
     # 可视化
     visualize(output_name)
@@ -0,0 +1,9 @@
+import os, sys
+
+SRC = os.path.join(os.path.dirname(os.path.abspath(__file__)), '../src')
+TESTCASES = os.path.join(os.path.dirname(os.path.abspath(__file__)), '../testcases')
+LG_SRC = os.path.join(os.path.dirname(os.path.abspath(__file__)), '../../legalization/src')
+LG_TESTCASES = os.path.join(os.path.dirname(os.path.abspath(__file__)), '../../legalization/testcase')
+
+sys.path.insert(0, SRC)
+sys.path.insert(1, LG_SRC)
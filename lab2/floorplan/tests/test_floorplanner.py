@@ -0,0 +1,36 @@
+'''
+Copyright (c) 2024 by Albresky, All Rights Reserved.
+
+Author: Albresky albre02@outlook.com
+Date: 2026-10-19 14:26:42
+LastEditTime: 2026-10-19 14:45:04
+FilePath: /EDA-assignments/lab2/floorplan/tests/test_floorplanner.py
+
+Description: Tests of the early termination of the B*-tree engine at a target gap.
+'''
+
+import os
+import random
+from conftest import TESTCASES
+from fp_parser import parse_dotblock, parse_dotnet
+from fp_utils import create_floorplanner
+from fp_writer import write_floorplan, read_output
+
+
+def test_gap_target_holds_for_the_result(tmp_path):
+    # The greedy placement starts at a gap of 1.0886, the annealing has to get below 1.085
+    random.seed(0)
+    outline, blocks, terminals = parse_dotblock(os.path.join(TESTCASES, 'ami33.block'))
+    nets = parse_dotnet(os.path.join(TESTCASES, 'ami33.nets'), blocks, terminals)
+    floorplanner = create_floorplanner('bstar', outline, blocks, terminals, nets,
+                                       {'alpha': 0.5, 'temperature': 1000, 'gap_target': 1.085})
+    floorplanner.initialize()
+    floorplanner.simulate_annealing(max_iterations=1000)
+    assert floorplanner.check_valid_all()
+    assert 1 < floorplanner.iterations < 1000
+    assert floorplanner.gap <= 1.085
+
+    cost, _, _, area, wirelength = floorplanner.calculate_cost()
+    output = str(tmp_path / 'ami33.output')
+    write_floorplan(output, floorplanner, cost, wirelength, area, 0)
+    assert read_output(output)[0]['Gap'] <= 1.085
@@ -0,0 +1,194 @@
+'''
+Copyright (c) 2024 by Albresky, All Rights Reserved.
+
+Author: Albresky albre02@outlook.com
+Date: 2026-10-19 14:21:00
+LastEditTime: 2026-10-19 14:23:43
+FilePath: /EDA-assignments/lab2/floorplan/tests/test_server.py
+
+Description: Tests of the design cache and of the resident service over a Unix socket.
+'''
+
+import os, sys
+import time
+import subprocess
+import pytest
+from conftest import SRC, TESTCASES, LG_TESTCASES
+from fp_server import DesignCache, _deep_sizeof
+from fp_client import FloorplanClient
+
+
+PAYLOAD = 1000
+
+
+def make_files(tmp_path, *names) -> list:
+    paths = []
+    for name in names:
+        path = tmp_path / name
+        path.write_text(name)
+        paths.append(str(path))
+    return paths
+
+
+class CountingParser:
+    """Parser stand-in returning a payload of known size and counting its calls."""
+    def __init__(self) -> None:
+        self.calls = []
+
+    def __call__(self, *paths) -> bytes:
+        self.calls.append(paths[0])
+        return bytes(PAYLOAD) + paths[0].encode()
+
+
+def test_cache_hit_and_miss(tmp_path):
+    a, = make_files(tmp_path, 'a')
+    parser = CountingParser()
+    cache = DesignCache()
+    first = cache.get('kind', parser, a)
+    assert cache.get('kind', parser, a) is first
+    assert parser.calls == [a]
+    assert cache.stats()['hits'] == 1 and cache.stats()['misses'] == 1
+
+
+def test_cache_evicts_least_recently_used(tmp_path):
+    a, b, c = make_files(tmp_path, 'a', 'b', 'c')
+    parser = CountingParser()
+    size = _deep_sizeof(parser(a))
+    parser.calls.clear()
+    cache = DesignCache(max_bytes=2 * size + size // 2)
+
+    cache.get('kind', parser, a)
+    cache.get('kind', parser, b)
+    cache.get('kind', parser, a)  # a is now the most recently used
+    cache.get('kind', parser, c)  # over budget, b goes
+    assert cache.stats()['designs'] == 2
+    assert cache.stats()['bytes'] <= cache.max_bytes
+
+    cache.get('kind', parser, a)
+    assert parser.calls == [a, b, c]
+    cache.get('kind', parser, b)
+    assert parser.calls == [a, b, c, b]
+
+
+def test_cache_skips_designs_over_budget(tmp_path):
+    a, = make_files(tmp_path, 'a')
+    parser = CountingParser()
+    cache = DesignCache(max_bytes=PAYLOAD // 2)
+    cache.get('kind', parser, a)
+    cache.get('kind', parser, a)
+    assert len(parser.calls) == 2
+    assert cache.stats()['designs'] == 0 and cache.stats()['bytes'] == 0
+
+
+def test_cache_invalidates_on_mtime_change(tmp_path):
+    a, b = make_files(tmp_path, 'a', 'b')
+    parser = CountingParser()
+    cache = DesignCache()
+    cache.get('kind', parser, a, b)
+    stat = os.stat(b)
+    os.utime(b, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    cache.get('kind', parser, a, b)
+    assert len(parser.calls) == 2
+    assert cache.stats()['designs'] == 1
+
+
+def test_cache_invalidates_on_dependency_change(tmp_path):
+    aux, pl = make_files(tmp_path, 'design.aux', 'design.pl')
+    parser = CountingParser()
+    cache = DesignCache()
+    cache.get('kind', parser, aux, depends=lambda path: [pl])
+    cache.get('kind', parser, aux, depends=lambda path: [pl])
+    assert len(parser.calls) == 1
+    stat = os.stat(pl)
+    os.utime(pl, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    cache.get('kind', parser, aux, depends=lambda path: [pl])
+    assert len(parser.calls) == 2
+
+
+@pytest.fixture
+def server(tmp_path):
+    """A server on a Unix socket in its own process, as it runs in production. Worker
+    processes forked from the test process would inherit the client sockets."""
+    socket_path = str(tmp_path / 'floorplan.sock')
+    process = subprocess.Popen([sys.executable, os.path.join(SRC, 'fp_server.py'), '--socket', socket_path, '--workers', '1'],
+                               stdout=subprocess.DEVNULL)
+    for _ in range(1000):
+        if os.path.exists(socket_path):
+            break
+        time.sleep(0.01)
+    yield socket_path
+    if process.poll() is None and os.path.exists(socket_path):
+        with FloorplanClient(socket_path) as client:
+            list(client.submit({'job': 'shutdown'}))
+    assert process.wait(timeout=30) == 0
+
+
+def floorplan_request(output:str = None) -> dict:
+    return {
+        'job': 'floorplan',
+        'blocks': os.path.join(TESTCASES, 'test.block'),
+        'nets': os.path.join(TESTCASES, 'test.nets'),
+        'engine': 'bstar',
+        'sa_params': {'iterations': 5, 'alpha': 0.5, 'temperature': 1000},
+        'output': output,
+    }
+
+
+def test_server_round_trip(server, tmp_path):
+    output = str(tmp_path / 'test.output')
+    with FloorplanClient(server) as client:
+        events = list(client.submit(floorplan_request(output)))
+        assert [e['event'] for e in events][0] == 'accepted'
+        assert events[-1]['event'] == 'done'
+
+        result = client.run(floorplan_request())
+        assert result['summary']['valid']
+        assert sorted(row[0] for row in result['blocks']) == ['A', 'B', 'C', 'D']
+
+        stats = next(client.submit({'job': 'stats'}))
+        assert stats['event'] == 'stats'
+        assert stats['cache']['misses'] == 1 and stats['cache']['hits'] == 1
+    assert os.path.exists(output)
+
+
+def test_server_reports_errors(server):
+    with FloorplanClient(server) as client:
+        events = list(client.submit({'job': 'nope'}))
+        assert len(events) == 1 and events[0]['event'] == 'error'
+        assert 'Unknown job' in events[0]['message']
+
+        request = floorplan_request()
+        request['blocks'] = '/nonexistent.block'
+        with pytest.raises(RuntimeError):
+            client.run(request)
+
+        # The connection stays usable after an error
+        assert client.run(floorplan_request())['summary']['valid']
+
+
+def test_server_shutdown(server):
+    with FloorplanClient(server) as client:
+        assert [e['event'] for e in client.submit({'job': 'shutdown'})] == ['done']
+    for _ in range(1000):
+        if not os.path.exists(server):
+            break
+        time.sleep(0.01)
+    assert not os.path.exists(server)
+
+
+def test_server_legalize_eco(server, tmp_path):
+    aux = os.path.join(LG_TESTCASES, 'ibm01/ibm01.aux')
+    legal = str(tmp_path / 'legal.pl')
+    eco = str(tmp_path / 'eco.pl')
+    with FloorplanClient(server) as client:
+        assert client.run({'job': 'legalize', 'aux': aux, 'output': legal})['summary']['valid']
+
+        request = {'job': 'legalize', 'aux': aux, 'base': legal, 'changes': [['a100', 3000, 2000]], 'output': eco, 'verify': True}
+        result = client.run(request)
+        assert result['summary']['valid'] and not result['summary']['warm']
+        assert 'a100' in [row[0] for row in result['blocks']]
+
+        # The next ECO on the output starts from the kept legalizer
+        request = {'job': 'legalize', 'aux': aux, 'base': eco, 'changes': [['a200', -7000, -13000]], 'verify': True}
+        result = client.run(request)
+        assert result['summary']['valid'] and result['summary']['warm']
@@ -0,0 +1,64 @@
+'''
+Copyright (c) 2024 by Albresky, All Rights Reserved.
+
+Author: Albresky albre02@outlook.com
+Date: 2026-10-19 14:41:52
+LastEditTime: 2026-10-19 14:41:52
+FilePath: /EDA-assignments/lab2/floorplan/tests/test_slicing.py
+
+Description: Tests of the slicing engine: the incremental moves, the fitting start and
+             the cost shared with the B*-tree engine.
+'''
+
+import os
+import random
+import pytest
+from conftest import TESTCASES
+from fp_parser import parse_dotblock, parse_dotnet
+from fp_slicing import SlicingFloorPlanner
+
+
+def load(name:str) -> SlicingFloorPlanner:
+    outline, blocks, terminals = parse_dotblock(os.path.join(TESTCASES, f'{name}.block'))
+    nets = parse_dotnet(os.path.join(TESTCASES, f'{name}.nets'), blocks, terminals)
+    return SlicingFloorPlanner(outline, blocks, terminals, nets, temperature=1, alpha=0.5)
+
+
+def test_moves_match_a_full_rebuild():
+    random.seed(0)
+    floorplanner = load('ami33')
+    floorplanner.expr = floorplanner.row_expression(floorplanner.outline.w)
+    floorplanner.build()
+    rebuilt = load('ami33')
+    for n in range(2000):
+        move = floorplanner.perturb()
+        if move is not None and n % 3 == 0:
+            floorplanner.revert(move)
+        if n % 50 == 0:
+            rebuilt.expr = list(floorplanner.expr)
+            rebuilt.build()
+            assert floorplanner.root.curve == rebuilt.root.curve
+            assert all(node.pos == k for k, node in floorplanner.leaves.items())
+            assert all(node.pos == k for k, node in floorplanner.operators.items())
+
+
+@pytest.mark.parametrize('name', ['ami33', 'ami49'])
+@pytest.mark.parametrize('seed', [None, 'quadratic'])
+def test_initial_expression_fits(name, seed):
+    random.seed(0)
+    floorplanner = load(name)
+    floorplanner.initialize(seed=seed)
+    assert floorplanner.is_within_outline()
+    assert floorplanner.check_valid_all()
+
+
+def test_cost_uses_the_bstar_normalization():
+    random.seed(0)
+    floorplanner = load('ami33')
+    floorplanner.initialize()
+    floorplanner.simulate_annealing(max_iterations=5)
+    cost, _, _, area, wirelength = floorplanner.calculate_cost()
+    area_norm = sum(b.width * b.height for b in floorplanner.blocks)
+    wirelen_norm = int(sum(0.5 * (b.width + b.height) for b in floorplanner.blocks))
+    assert cost == pytest.approx(0.5 * area / area_norm + 0.5 * wirelength / wirelen_norm)
+    assert floorplanner.check_valid_all()
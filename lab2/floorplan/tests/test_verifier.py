@@ -0,0 +1,91 @@
+'''
+Copyright (c) 2024 by Albresky, All Rights Reserved.
+
+Author: Albresky albre02@outlook.com
+Date: 2026-10-19 14:44:33
+LastEditTime: 2026-10-19 14:44:33
+FilePath: /EDA-assignments/lab2/floorplan/tests/test_verifier.py
+
+Description: Tests of the sweep-line verifier of the floorplans and of the row-binned
+             verifier of the row placements.
+'''
+
+import os
+import pytest
+from conftest import LG_TESTCASES
+from fp_units import Outline, Block
+from fp_verifier import find_overlaps, verify_floorplan
+from lg_store import load_design, node_arrays
+from lg_verifier import verify_placement
+
+
+def test_find_overlaps_touching_and_degenerate():
+    # touching edges, then a zero-width rectangle 4 units away from the next one
+    assert find_overlaps([0, 2], [0, 0], [2, 4], [1, 1]) == []
+    assert find_overlaps([1, 5], [0, 0], [1, 6], [10, 10]) == []
+    assert find_overlaps([0, 1, 3], [0, 0, 0], [2, 1, 4], [1, 1, 1]) == []
+    assert find_overlaps([0, 1], [0, 0], [2, 3], [1, 1]) == [(0, 1)]
+
+
+def test_find_overlaps_skip_mask():
+    xl, yl, xh, yh = [0, 1, 1], [0, 0, 0], [2, 3, 3], [1, 1, 1]
+    assert sorted(find_overlaps(xl, yl, xh, yh)) == [(0, 1), (0, 2), (1, 2)]
+    assert sorted(find_overlaps(xl, yl, xh, yh, skip=[False, True, True])) == [(0, 1), (0, 2)]
+
+
+def test_verify_floorplan():
+    blocks = [Block('a', 4, 4), Block('b', 4, 4), Block('c', 4, 4)]
+    for block, (x, y) in zip(blocks, [(0, 0), (4, 0), (3, 3)]):
+        block.x, block.y, block.placed = x, y, True
+    result = verify_floorplan(Outline(8, 6), blocks)
+    assert sorted(result.overlaps) == [(0, 2), (1, 2)]
+    assert result.outside == [2]
+    assert not result.is_valid
+
+
+@pytest.fixture(scope='module')
+def ibm01():
+    design = load_design(os.path.join(LG_TESTCASES, 'ibm01/ibm01.aux'))
+    names, x, y, w, h, fixed = node_arrays(design)
+    return design, x, y, w, h, fixed
+
+
+def test_verify_placement_matches_the_sweep_line(ibm01):
+    # The global placement is mostly off the rows
+    design, x, y, w, h, fixed = ibm01
+    result = verify_placement(design)
+    assert result.misaligned
+    assert sorted(result.overlaps) == sorted(find_overlaps(x, y, x + w, y + h, skip=fixed))
+
+
+def write_design(dirname, cells:list) -> str:
+    """Write a design of two rows of 10 sites, cells given as (name, x, y, width, height)."""
+    with open(os.path.join(dirname, 'tiny.scl'), 'w') as f:
+        f.write('NumRows : 2\n\n')
+        for y in (0, 10):
+            f.write(f'CoreRow Horizontal\n Coordinate : {y}\n Height : 10\n Sitewidth : 1\n'
+                    f' NumSites : 10\n SubrowOrigin : 0\nEnd\n')
+    with open(os.path.join(dirname, 'tiny.node'), 'w') as fn, open(os.path.join(dirname, 'tiny.pl'), 'w') as fp:
+        fn.write(f'NumNodes : {len(cells)}\nNumTerminals : 0\n\n')
+        fp.write('UCLA pl 1.0\n\n')
+        for name, x, y, width, height in cells:
+            fn.write(f'{name} {width} {height}\n')
+            fp.write(f'{name} {x} {y} : N\n')
+    with open(os.path.join(dirname, 'tiny.aux'), 'w') as f:
+        f.write('RowBasedPlacement : tiny.node tiny.pl tiny.scl\nMaxDisplacement : 100\n')
+    return os.path.join(dirname, 'tiny.aux')
+
+
+def test_verify_placement_all_pairs_in_a_row(tmp_path):
+    aux = write_design(str(tmp_path), [('A', 0, 0, 10, 10), ('B', 2, 0, 2, 10), ('C', 3, 0, 2, 10)])
+    result = verify_placement(load_design(aux))
+    assert sorted(result.overlaps) == [(0, 1), (0, 2), (1, 2)]
+
+
+def test_verify_placement_between_rows(tmp_path):
+    # D sits half a row up and overlaps A and E, F only touches A
+    aux = write_design(str(tmp_path), [('A', 0, 0, 4, 10), ('D', 2, 5, 2, 10), ('E', 3, 10, 2, 10),
+                                       ('F', 4, 0, 2, 10)])
+    result = verify_placement(load_design(aux))
+    assert sorted(result.overlaps) == [(0, 1), (1, 2)]
+    assert result.misaligned == [1]
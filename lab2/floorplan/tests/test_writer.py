@@ -0,0 +1,50 @@
+'''
+Copyright (c) 2024 by Albresky, All Rights Reserved.
+
+Author: Albresky albre02@outlook.com
+Date: 2026-10-19 14:24:03
+LastEditTime: 2026-10-19 14:24:03
+FilePath: /EDA-assignments/lab2/floorplan/tests/test_writer.py
+
+Description: Tests of the streaming displacement pass between two .pl files.
+'''
+
+import pytest
+import fp_writer
+from fp_writer import write_pl, displacement_stats
+
+
+@pytest.fixture(autouse=True)
+def small_chunks(monkeypatch):
+    monkeypatch.setattr(fp_writer, 'CHUNK_ROWS', 4)
+
+
+def write(path, rows) -> str:
+    write_pl(str(path), [r[0] for r in rows], [r[1] for r in rows], [r[2] for r in rows])
+    return str(path)
+
+
+def test_same_order(tmp_path):
+    rows = [(f'c{i}', i * 10, 0) for i in range(10)]
+    moved = [(n, x + 3, y - 1) for n, x, y in rows]
+    stats = displacement_stats(write(tmp_path / 'out.pl', moved), write(tmp_path / 'in.pl', rows), 3.5)
+    assert stats['count'] == 10 and stats['unmatched'] == 0
+    assert stats['total'] == 40 and stats['max'] == 4 and stats['over'] == 10
+
+
+def test_output_longer_than_input(tmp_path):
+    rows = [(f'c{i}', i * 10, 0) for i in range(6)]
+    # ECO added cells in front: the tail of the output lands in chunks the input does not have
+    out = [(f'n{i}', 0, 0) for i in range(4)] + rows[:5] + [('c5', 50 + 777, 0)]
+    stats = displacement_stats(write(tmp_path / 'out.pl', out), write(tmp_path / 'in.pl', rows), 100)
+    assert stats['count'] == 6
+    assert stats['max'] == 777 and stats['max_node'] == 'c5' and stats['over'] == 1
+    assert stats['unmatched'] == 4
+
+
+def test_input_longer_than_output(tmp_path):
+    rows = [(f'c{i}', i * 10, 0) for i in range(10)]
+    out = [(n, x, y + 5) for n, x, y in rows[:3]]
+    stats = displacement_stats(write(tmp_path / 'out.pl', out), write(tmp_path / 'in.pl', rows))
+    assert stats['count'] == 3 and stats['total'] == 15
+    assert stats['unmatched'] == 7
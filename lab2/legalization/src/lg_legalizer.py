@@ -0,0 +1,403 @@
+'''
+Copyright (c) 2024 by Albresky, All Rights Reserved.
+
+Author: Albresky albre02@outlook.com
+Date: 2026-10-19 13:19:42
+LastEditTime: 2026-10-19 14:23:43
+FilePath: /EDA-assignments/lab2/legalization/src/lg_legalizer.py
+
+Description: Row-based legalizer with an incremental (ECO) mode that only touches the
+             rows and windows around the changed cells.
+'''
+
+import os, sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '.'))
+
+import math
+import time
+import argparse
+from bisect import bisect_left, bisect_right
+from lg_units import Node, Design
+from lg_store import load_design, load_dotpl, node_arrays, write_dotpl
+from fp_writer import displacement_stats
+
+
+class SubRow:
+    """A subrow with its cells kept sorted by x.
+    """
+    def __init__(self, row) -> None:
+        self.y = row.coordinate
+        self.height = row.height
+        self.site_width = row.site_width
+        self.origin = row.subrow_origin
+        self.end = row.end
+        self.starts = []
+        self.ends = []
+        self.ids = []
+
+    def snap_up(self, x:float) -> int:
+        return self.origin + math.ceil((x - self.origin) / self.site_width - 1e-9) * self.site_width
+
+    def snap_down(self, x:float) -> int:
+        return self.origin + math.floor((x - self.origin) / self.site_width + 1e-9) * self.site_width
+
+    def insert(self, i:int, x:float, w:float) -> None:
+        k = bisect_right(self.starts, x)
+        self.starts.insert(k, x)
+        self.ends.insert(k, x + w)
+        self.ids.insert(k, i)
+
+    def remove(self, i:int, x:float) -> None:
+        k = bisect_left(self.starts, x)
+        while self.ids[k] != i:
+            k += 1
+        del self.starts[k], self.ends[k], self.ids[k]
+
+    def best_gap(self, x:float, w:float, bound:float) -> tuple:
+        """Find the site-aligned position closest to x where a cell of width w fits in
+        the free space, scanning the gaps outward from x.
+
+        Args:
+            x (float): The desired x.
+            w (float): The cell width.
+            bound (float): Only positions closer than bound are of interest.
+
+        Returns:
+            tuple: (position, distance), position is None if nothing fits within bound.
+        """
+        starts, ends = self.starts, self.ends
+        n = len(starts)
+        best, best_dist = None, bound
+        k = bisect_right(starts, x)
+
+        # Gap j lies between cell j-1 and cell j
+        def gap(j) -> tuple:
+            left = ends[j - 1] if j > 0 else self.origin
+            right = starts[j] if j < n else self.end
+            return left, right, self.snap_up(left), self.snap_down(right - w)
+
+        j = k
+        while j <= n:
+            _, _, lo, hi = gap(j)
+            if lo - x >= best_dist:
+                break
+            if lo <= hi:
+                pos = min(max(self.snap_down(x), lo), hi)
+                if abs(pos - x) < best_dist:
+                    best, best_dist = pos, abs(pos - x)
+            j += 1
+        j = k - 1
+        while j >= 0:
+            _, right, lo, hi = gap(j)
+            if x - (right - w) >= best_dist:
+                break
+            if lo <= hi:
+                pos = min(max(self.snap_up(x), lo), hi)
+                if abs(pos - x) < best_dist:
+                    best, best_dist = pos, abs(pos - x)
+            j -= 1
+        return best, best_dist
+
+
+class Legalizer:
+    """Greedy row legalizer. Every cell goes to the closest free, site-aligned slot over
+    the nearby rows; if no slot fits, the neighbours inside the row are pushed aside.
+    The row occupancy is kept after the run, so a later `eco` call only re-places the
+    changed cells and the neighbours it has to push.
+
+    Slots and pushes are searched within MaxDisplacement of the design first, measured
+    from the target of the placed cell and from the global placement of the pushed ones.
+    Only when nothing fits within it the search goes further, such cells are kept in
+    `over_displaced`.
+
+    Movable cells are expected to be single-row, fixed nodes block every row they cross.
+    """
+    def __init__(self, design:Design, xs:list = None, ys:list = None) -> None:
+        """The constructor of the legalizer.
+
+        Args:
+            design (Design): The design or DesignStore, node positions are the global placement.
+            xs (list, optional): x of a legal placement to start from, for ECO. Defaults to None.
+            ys (list, optional): y of a legal placement to start from, for ECO. Defaults to None.
+        """
+        self.design = design
+        self.subrows = sorted((SubRow(r) for r in design.rows), key=lambda s: (s.y, s.origin))
+        self.levels = sorted({s.y for s in self.subrows})
+        self.level_subrows = {y: [s for s in self.subrows if s.y == y] for y in self.levels}
+        _, gx, gy, w, h, fixed = node_arrays(design)
+        self.gx, self.gy = gx.tolist(), gy.tolist()
+        self.w, self.h, self.fixed = w.tolist(), h.tolist(), fixed.tolist()
+        # Python floats, the positions of a .pl come in float32 arrays
+        self.x = list(self.gx) if xs is None else [float(v) for v in xs]
+        self.y = list(self.gy) if ys is None else [float(v) for v in ys]
+        self.placed = {}
+        self.max_displacement = design.max_displacement
+        self.over_displaced = set()
+
+        for i in range(len(self.w)):
+            if self.fixed[i]:
+                self._block(i)
+            elif xs is not None:
+                sub = self._subrow_at(self.x[i], self.y[i])
+                if sub is None:
+                    raise ValueError(f'Node {design.nodes[i].name} is not on a row @({self.x[i]}, {self.y[i]})')
+                self._occupy(i, sub, self.x[i])
+
+    def _subrow_at(self, x:float, y:float) -> SubRow:
+        for sub in self.level_subrows.get(y, []):
+            if sub.origin <= x < sub.end:
+                return sub
+        return None
+
+    def _block(self, i:int) -> None:
+        x, y, w, h = self.x[i], self.y[i], self.w[i], self.h[i]
+        if w <= 0 or h <= 0:
+            return
+        for sub in self.subrows:
+            if sub.y < y + h and sub.y + sub.height > y and sub.origin < x + w and sub.end > x:
+                sub.insert(i, x, w)
+
+    def _occupy(self, i:int, sub:SubRow, x:float) -> None:
+        sub.insert(i, x, self.w[i])
+        self.x[i], self.y[i] = x, sub.y
+        self.placed[i] = sub
+
+    def _release(self, i:int) -> None:
+        sub = self.placed.pop(i, None)
+        if sub is not None:
+            sub.remove(i, self.x[i])
+
+    def _levels_by_distance(self, y:float):
+        k = bisect_left(self.levels, y)
+        lo, hi = k - 1, k
+        while lo >= 0 or hi < len(self.levels):
+            if hi >= len(self.levels) or (lo >= 0 and y - self.levels[lo] <= self.levels[hi] - y):
+                yield self.levels[lo]
+                lo -= 1
+            else:
+                yield self.levels[hi]
+                hi += 1
+
+    def place_cell(self, i:int, x:float, y:float) -> list:
+        """Place cell i as close as possible to (x, y), within MaxDisplacement if possible.
+
+        Returns:
+            list: The ids of the cells whose position changed.
+        """
+        self.over_displaced.discard(i)
+        bound = self.max_displacement
+        moved = self._find_gap(i, x, y, bound) or self._find_push(i, x, y, bound)
+        if moved is None:
+            moved = self._find_gap(i, x, y, float('inf')) or self._find_push(i, x, y, float('inf'))
+            if moved is None:
+                raise RuntimeError(f'No room left for node {self.design.nodes[i].name}')
+            self.over_displaced.add(i)
+        return moved
+
+    def _find_gap(self, i:int, x:float, y:float, bound:float) -> list:
+        """Move cell i to the closest free slot within bound (Manhattan) of (x, y).
+
+        Returns:
+            list: [i], None if no slot is within bound.
+        """
+        w = self.w[i]
+        best, best_cost = None, math.nextafter(bound, math.inf)
+        for level in self._levels_by_distance(y):
+            dy = abs(level - y)
+            if dy >= best_cost:
+                break
+            for sub in self.level_subrows[level]:
+                pos, dx = sub.best_gap(x, w, best_cost - dy)
+                if pos is not None and dx + dy < best_cost:
+                    best, best_cost = (sub, pos), dx + dy
+        if best is None:
+            return None
+        self._occupy(i, best[0], best[1])
+        return [i]
+
+    def _find_push(self, i:int, x:float, y:float, bound:float) -> list:
+        """Insert cell i into the nearest subrow that can make room by pushing, keeping
+        every cell within bound.
+
+        Returns:
+            list: The ids of the moved cells, None if no subrow within bound can make room.
+        """
+        for level in self._levels_by_distance(y):
+            dy = abs(level - y)
+            if dy > bound:
+                break
+            for sub in sorted(self.level_subrows[level], key=lambda s: max(s.origin - x, x - s.end, 0)):
+                if max(sub.origin - x, x - sub.end, 0) + dy > bound:
+                    continue
+                moved = self._push_insert(i, sub, x, bound - dy, bound)
+                if moved is not None:
+                    return moved
+        return None
+
+    def _push_insert(self, i:int, sub:SubRow, x:float, reach:float = float('inf'), bound:float = float('inf')) -> list:
+        """Insert cell i at x in the subrow and push the neighbours aside: first to the
+        right, shifting the cluster back to the left when it hits the row end or a fixed
+        node, then to the left.
+
+        Args:
+            i (int): The cell.
+            sub (SubRow): The subrow.
+            x (float): The desired x.
+            reach (float, optional): The max |x distance| of cell i. Defaults to inf.
+            bound (float, optional): The max displacement of the pushed cells from their
+                global placement, unless they were already further. Defaults to inf.
+
+        Returns:
+            list: The ids of the moved cells, None if the subrow is too full or a cell
+                would move beyond its bound.
+        """
+        w = self.w[i]
+        pos = min(max(sub.snap_down(x), sub.origin), sub.snap_down(sub.end - w))
+        if pos < sub.origin:
+            return None
+        k = bisect_right(sub.starts, pos)
+        ids = sub.ids[:k] + [i] + sub.ids[k:]
+        starts = sub.starts[:k] + [pos] + sub.starts[k:]
+        widths = [e - s for s, e in zip(sub.starts, sub.ends)]
+        widths = widths[:k] + [w] + widths[k:]
+        fixed = [self.fixed[c] for c in ids]
+        new = list(starts)
+
+        # Push right
+        j = k + 1
+        while j < len(ids) and new[j] < new[j - 1] + widths[j - 1] and not fixed[j]:
+            new[j] = sub.snap_up(new[j - 1] + widths[j - 1])
+            j += 1
+        limit = sub.end if j == len(ids) else new[j]
+        overflow = new[j - 1] + widths[j - 1] - limit
+        if overflow > 0:
+            shift = math.ceil(overflow / sub.site_width - 1e-9) * sub.site_width
+            for m in range(k, j):
+                new[m] -= shift
+        # Push left
+        m = k - 1
+        while m >= 0 and new[m] + widths[m] > new[m + 1]:
+            if fixed[m]:
+                return None
+            new[m] = sub.snap_down(new[m + 1] - widths[m])
+            m -= 1
+        if m < 0 and new[0] < sub.origin:
+            return None
+        if abs(new[k] - x) > reach:
+            return None
+        if bound < float('inf'):
+            dy = [abs(sub.y - self.gy[c]) for c in ids]
+            for c, s0, s1, d in zip(ids, starts, new, dy):
+                if c != i and s0 != s1 and abs(s1 - self.gx[c]) + d > max(bound, abs(s0 - self.gx[c]) + d):
+                    return None
+
+        moved = []
+        for c, s0, s1 in zip(ids, starts, new):
+            if c != i and s0 != s1:
+                self.x[c] = s1
+                moved.append(c)
+        sub.starts = new
+        sub.ends = [s + wd for s, wd in zip(new, widths)]
+        sub.ids = ids
+        self.x[i], self.y[i] = new[k], sub.y
+        self.placed[i] = sub
+        return [i] + moved
+
+    def legalize(self) -> float:
+        """Legalize all movable cells from the global placement of the design.
+
+        Returns:
+            float: The runtime in seconds.
+        """
+        start_time = time.time()
+        for i in list(self.placed):
+            self._release(i)
+        order = sorted((i for i in range(len(self.w)) if not self.fixed[i]), key=lambda i: self.gx[i])
+        for i in order:
+            self.place_cell(i, self.gx[i], self.gy[i])
+        return time.time() - start_time
+
+    def eco(self, changes:list) -> list:
+        """Re-legalize only the changed cells. Each change is (name, x, y) for a moved
+        cell, or (name, x, y, width, height) for a resized or added one.
+
+        Args:
+            changes (list): The changed cells.
+
+        Returns:
+            list: The ids of all cells whose position changed.
+        """
+        targets = []
+        for change in changes:
+            name, x, y = change[0], float(change[1]), float(change[2])
+            node = self.design.node_dict.get(name)
+            if node is None:
+                if len(change) < 5:
+                    raise ValueError(f'Unknown node {name}, width and height are required to add it')
+                node = Node(name, int(change[3]), int(change[4]))
+                node.x, node.y = x, y
+                self.design.add_node(node)
+                for attr, value in (('gx', x), ('gy', y), ('x', x), ('y', y), ('w', node.width), ('h', node.height), ('fixed', False)):
+                    getattr(self, attr).append(value)
+                i = len(self.w) - 1
+            else:
+                i = self.design.index_of(name)
+                self._release(i)
+                if len(change) > 3:
+                    node.width, node.height = int(change[3]), int(change[4])
+                    self.w[i], self.h[i] = node.width, node.height
+            targets.append((x, y, i))
+
+        touched = []
+        for x, y, i in sorted(targets):
+            touched += self.place_cell(i, x, y)
+        return list(dict.fromkeys(touched))
+
+
+def read_changes(filename:str) -> list:
+    """Read an ECO change list, one `name x y [width height]` per line.
+    """
+    changes = []
+    with open(filename, 'r') as f:
+        for line in f:
+            parts = line.split()
+            if parts and not parts[0].startswith('#'):
+                changes.append(parts)
+    return changes
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Row-based legalizer')
+    parser.add_argument('aux', help='The .aux file of the design')
+    parser.add_argument('-o', '--output', required=True, help='The output .pl file')
+    parser.add_argument('--base', default=None, help='ECO: a legal .pl to start from')
+    parser.add_argument('--changes', default=None, help='ECO: the change list, `name x y [width height]` per line')
+    args = parser.parse_args()
+
+    design = load_design(args.aux)
+    start_time = time.time()
+    if args.base:
+        n = design.num_nodes
+        xs, ys = load_dotpl(args.base, design, design.x[:n].copy(), design.y[:n].copy())
+        legalizer = Legalizer(design, xs, ys)
+        setup_time = time.time() - start_time
+        start_time = time.time()
+        touched = legalizer.eco(read_changes(args.changes)) if args.changes else []
+        print(f'ECO: {len(touched)} cells moved, setup {setup_time:.3f}s, eco {time.time() - start_time:.3f}s')
+    else:
+        legalizer = Legalizer(design)
+        print(f'Legalized {len(design.nodes)} nodes in {legalizer.legalize():.3f}s')
+    if legalizer.over_displaced:
+        print(f'{len(legalizer.over_displaced)} cells found no room within MaxDisplacement')
+    start_time = time.time()
+    write_dotpl(args.output, design, legalizer.x, legalizer.y)
+    print(f'Wrote {args.output} in {time.time() - start_time:.3f}s')
+
+    stats = displacement_stats(args.output, design.files['.pl'], design.max_displacement)
+    print(f"Displacement: mean {stats['mean']:.1f}, max {stats['max']:.1f} ({stats['max_node']}), "
+          f"{stats['over']} over MaxDisplacement, {stats['unmatched']} unmatched")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,147 @@
+'''
+Copyright (c) 2024 by Albresky, All Rights Reserved.
+
+Author: Albresky albre02@outlook.com
+Date: 2026-10-19 13:17:38
+LastEditTime: 2026-10-19 13:17:38
+FilePath: /EDA-assignments/lab2/legalization/src/lg_parser.py
+
+Description: Parsers for Bookshelf .aux, .node, .pl and .scl files.
+'''
+
+import os
+from lg_units import *
+
+
+def parse_dotaux(filename:str) -> Design:
+    """Parse the .aux file and the .node, .pl and .scl files it refers to.
+
+    Args:
+        filename (str): The path to the .aux file.
+
+    Returns:
+        Design: The parsed design with initial positions and rows.
+    """
+
+    dirname = os.path.dirname(filename)
+    design = Design(os.path.splitext(os.path.basename(filename))[0])
+    files = {}
+    with open(filename, 'r') as f:
+        for line in f:
+            if ':' not in line:
+                continue
+            key, value = line.split(':', 1)
+            key = key.strip()
+            if key == 'MaxDisplacement':
+                design.max_displacement = float(value)
+            else:
+                for name in value.split():
+                    files[os.path.splitext(name)[1]] = os.path.join(dirname, name)
+
+    parse_dotnode(files['.node'], design)
+    parse_dotpl(files['.pl'], design)
+    parse_dotscl(files['.scl'], design)
+    return design
+
+def parse_dotnode(filename:str, design:Design) -> Design:
+    """Parse the .node file and add the nodes to the design.
+
+    Args:
+        filename (str): The path to the .node file.
+        design (Design): The design to fill.
+
+    Returns:
+        Design: The design.
+    """
+
+    with open(filename, 'r') as f:
+        for line in f:
+            parts = line.split()
+            if not parts or parts[0].startswith('#') or parts[0] in ('UCLA', 'NumNodes', 'NumTerminals'):
+                continue
+            if len(parts) < 3:
+                raise ValueError('Invalid node line: {}'.format(line.strip()))
+            terminal = len(parts) > 3 and parts[3].startswith('terminal')
+            design.add_node(Node(parts[0], int(float(parts[1])), int(float(parts[2])), terminal))
+    return design
+
+def iter_dotpl(filename:str):
+    """Iterate over the entries of a .pl file.
+
+    Args:
+        filename (str): The path to the .pl file.
+
+    Yields:
+        tuple: (name, x, y, orient, fixed) of each entry.
+    """
+
+    with open(filename, 'r') as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) < 3 or parts[0].startswith('#') or parts[0] == 'UCLA':
+                continue
+            orient = parts[4] if len(parts) > 4 else 'N'
+            yield parts[0], float(parts[1]), float(parts[2]), orient, '/FIXED' in parts
+
+def parse_dotpl(filename:str, design:Design) -> Design:
+    """Parse the .pl file and set the positions of the nodes.
+
+    Args:
+        filename (str): The path to the .pl file.
+        design (Design): The design holding the nodes.
+
+    Returns:
+        Design: The design.
+    """
+
+    node_dict = design.node_dict
+    for name, x, y, orient, fixed in iter_dotpl(filename):
+        node = node_dict.get(name)
+        if node is None:
+            print(f'Warning: Unknown node {name}')
+            continue
+        node.x = x
+        node.y = y
+        node.orient = orient
+        node.fixed = node.fixed or fixed
+    return design
+
+def parse_dotscl(filename:str, design:Design) -> Design:
+    """Parse the .scl file and add the core rows to the design.
+
+    Args:
+        filename (str): The path to the .scl file.
+        design (Design): The design to fill.
+
+    Returns:
+        Design: The design.
+    """
+
+    fields = None
+    with open(filename, 'r') as f:
+        for line in f:
+            parts = line.replace(':', ' ').split()
+            if not parts:
+                continue
+            if parts[0] == 'CoreRow':
+                fields = {}
+            elif parts[0] == 'End' and fields is not None:
+                design.add_row(Row(int(fields['Coordinate']),
+                                   int(fields['Height']),
+                                   int(fields.get('Sitewidth', 1)),
+                                   int(fields['NumSites']),
+                                   int(fields['SubrowOrigin'])))
+                fields = None
+            elif fields is not None:
+                # "SubrowOrigin : x NumSites : n" may share one line
+                for key, value in zip(parts[0::2], parts[1::2]):
+                    fields[key] = value
+    return design
+
+
+if __name__ == '__main__':
+
+    ######## Test parse_dotaux ########
+    design = parse_dotaux('../testcase/ibm01/ibm01.aux')
+    print(f'{design.name}: {len(design.nodes)} nodes, {len(design.rows)} rows, MaxDisplacement={design.max_displacement}')
+    pass
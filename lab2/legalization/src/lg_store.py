@@ -0,0 +1,567 @@
+'''
+Copyright (c) 2024 by Albresky, All Rights Reserved.
+
+Author: Albresky albre02@outlook.com
+Date: 2026-10-19 13:23:16
+LastEditTime: 2026-10-19 14:53:04
+FilePath: /EDA-assignments/lab2/legalization/src/lg_store.py
+
+Description: Compact array-based store for million-cell Bookshelf designs, with an
+             accessor layer that mimics `Design`/`Node`/`Row`.
+'''
+
+import os, sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '.'))
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '../../floorplan/src'))
+
+import numpy as np
+from lg_units import Node, Row
+from fp_writer import write_pl
+
+ORIENTS = ['N', 'S', 'E', 'W', 'FN', 'FS', 'FE', 'FW']
+FLAG_FIXED = 1
+CHUNK_BYTES = 1 << 14
+
+
+class NodeView:
+    """Accessor to one node of a `DesignStore`, reads and writes go to the arrays.
+    """
+    __slots__ = ('store', 'i')
+
+    def __init__(self, store, i:int) -> None:
+        self.store = store
+        self.i = i
+
+    @property
+    def name(self) -> str:
+        return self.store.names[self.i].decode()
+
+    @property
+    def width(self) -> int:
+        return int(self.store.width[self.i])
+
+    @width.setter
+    def width(self, value:int) -> None:
+        self.store.width[self.i] = value
+
+    @property
+    def height(self) -> int:
+        return int(self.store.height[self.i])
+
+    @height.setter
+    def height(self, value:int) -> None:
+        self.store.height[self.i] = value
+
+    @property
+    def x(self) -> float:
+        return float(self.store.x[self.i])
+
+    @x.setter
+    def x(self, value:float) -> None:
+        self.store.x[self.i] = value
+
+    @property
+    def y(self) -> float:
+        return float(self.store.y[self.i])
+
+    @y.setter
+    def y(self, value:float) -> None:
+        self.store.y[self.i] = value
+
+    @property
+    def fixed(self) -> bool:
+        return bool(self.store.flags[self.i] & FLAG_FIXED)
+
+    @fixed.setter
+    def fixed(self, value:bool) -> None:
+        if value:
+            self.store.flags[self.i] |= FLAG_FIXED
+        else:
+            self.store.flags[self.i] &= ~FLAG_FIXED
+
+    @property
+    def orient(self) -> str:
+        return ORIENTS[self.store.orient[self.i]]
+
+    @orient.setter
+    def orient(self, value:str) -> None:
+        self.store.orient[self.i] = ORIENTS.index(value)
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, NodeView) and other.store is self.store and other.i == self.i
+
+    def __hash__(self) -> int:
+        return hash((id(self.store), self.i))
+
+
+class NodeList:
+    """Sequence of `NodeView`, stands in for `Design.nodes`.
+    """
+    def __init__(self, store) -> None:
+        self.store = store
+
+    def __len__(self) -> int:
+        return self.store.num_nodes
+
+    def __getitem__(self, i:int) -> NodeView:
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        return NodeView(self.store, i)
+
+    def __iter__(self):
+        store = self.store
+        for i in range(store.num_nodes):
+            yield NodeView(store, i)
+
+    def index(self, node:NodeView) -> int:
+        return node.i
+
+
+class NodeIndex:
+    """Name lookup, stands in for `Design.node_dict`.
+    """
+    def __init__(self, store) -> None:
+        self.store = store
+
+    def get(self, name:str, default=None):
+        i = self.store.index_of(name)
+        return default if i < 0 else NodeView(self.store, i)
+
+    def __getitem__(self, name:str) -> NodeView:
+        node = self.get(name)
+        if node is None:
+            raise KeyError(name)
+        return node
+
+    def __contains__(self, name:str) -> bool:
+        return self.store.index_of(name) >= 0
+
+    def __len__(self) -> int:
+        return self.store.num_nodes
+
+
+class NameList:
+    """Decoded names by index, e.g. for `VerifyResult`.
+    """
+    def __init__(self, store) -> None:
+        self.store = store
+
+    def __len__(self) -> int:
+        return self.store.num_nodes
+
+    def __getitem__(self, i:int) -> str:
+        return self.store.names[i].decode()
+
+
+class DesignStore:
+    """Compact Bookshelf design: an interned name table (fixed-width bytes plus a sorted
+    index for lookups), int32 sizes, float32 positions and uint8 flags, and the rows as
+    int32 arrays. `nodes`, `node_dict` and `rows` give `Design`-like access on top.
+    """
+    def __init__(self, name:str = '', capacity:int = 0) -> None:
+        """The constructor of the design store.
+
+        Args:
+            name (str, optional): The design name. Defaults to ''.
+            capacity (int, optional): Number of nodes to preallocate. Defaults to 0.
+        """
+        self.name = name
+        self.num_nodes = 0
+        self.max_displacement = float('inf')
+        self.names = np.zeros(capacity, dtype='S8')
+        self.width = np.zeros(capacity, dtype=np.int32)
+        self.height = np.zeros(capacity, dtype=np.int32)
+        self.x = np.zeros(capacity, dtype=np.float32)
+        self.y = np.zeros(capacity, dtype=np.float32)
+        self.flags = np.zeros(capacity, dtype=np.uint8)
+        self.orient = np.zeros(capacity, dtype=np.uint8)
+        # Sorted index over the bulk-loaded names, single added nodes go to a dict
+        self._order = None
+        self._added = {}
+
+        self.row_coordinate = np.zeros(0, dtype=np.int32)
+        self.row_height = np.zeros(0, dtype=np.int32)
+        self.row_site_width = np.zeros(0, dtype=np.int32)
+        self.row_num_sites = np.zeros(0, dtype=np.int32)
+        self.row_origin = np.zeros(0, dtype=np.int32)
+
+        self.files = {}
+        self.nodes = NodeList(self)
+        self.node_dict = NodeIndex(self)
+        self.node_names = NameList(self)
+
+    @property
+    def rows(self) -> list:
+        return [Row(int(c), int(h), int(sw), int(n), int(o)) for c, h, sw, n, o in
+                zip(self.row_coordinate, self.row_height, self.row_site_width, self.row_num_sites, self.row_origin)]
+
+    @property
+    def nbytes(self) -> int:
+        arrays = [self.names, self.width, self.height, self.x, self.y, self.flags, self.orient,
+                  self.row_coordinate, self.row_height, self.row_site_width, self.row_num_sites, self.row_origin]
+        return sum(a.nbytes for a in arrays) + (0 if self._order is None else self._order.nbytes)
+
+    def _reserve(self, capacity:int) -> None:
+        if capacity <= len(self.width):
+            return
+        capacity = max(capacity, 2 * len(self.width))
+        for attr in ('names', 'width', 'height', 'x', 'y', 'flags', 'orient'):
+            old = getattr(self, attr)
+            new = np.zeros(capacity, dtype=old.dtype)
+            new[:len(old)] = old
+            setattr(self, attr, new)
+
+    def _fit_names(self, chunk:np.ndarray) -> None:
+        if chunk.dtype.itemsize > self.names.dtype.itemsize:
+            self.names = self.names.astype(chunk.dtype)
+
+    def append_nodes(self, names, widths, heights, fixed) -> None:
+        """Append a chunk of nodes.
+
+        Args:
+            names (array-like): The node names as bytes.
+            widths, heights (array-like): The node sizes.
+            fixed (array-like): Whether the nodes are terminals.
+        """
+        names = np.asarray(names, dtype='S')
+        n, k = self.num_nodes, len(names)
+        self._reserve(n + k)
+        self._fit_names(names)
+        self.names[n:n + k] = names
+        self.width[n:n + k] = widths
+        self.height[n:n + k] = heights
+        self.flags[n:n + k] = np.where(fixed, FLAG_FIXED, 0)
+        self.num_nodes = n + k
+        self._order = None
+        self._added = {}
+
+    def add_node(self, node:Node) -> None:
+        """Add a single node, same interface as `Design.add_node`.
+        """
+        i = self.num_nodes
+        order, added = self._order, self._added
+        self.append_nodes([node.name.encode()], [node.width], [node.height], [node.fixed])
+        if order is not None:
+            self._order, self._added = order, added
+            self._added[node.name.encode()] = i
+        self.x[i], self.y[i] = node.x, node.y
+        self.orient[i] = ORIENTS.index(node.orient)
+
+    def indices_of(self, names:np.ndarray) -> np.ndarray:
+        """Vectorized name lookup.
+
+        Args:
+            names (np.ndarray): The names as bytes.
+
+        Returns:
+            np.ndarray: The node indices, -1 for unknown names.
+        """
+        names = np.asarray(names, dtype='S')
+        if self._order is None:
+            self._order = np.argsort(self.names[:self.num_nodes], kind='stable').astype(np.int32)
+        if len(self._order) == 0:
+            found = np.full(len(names), -1)
+        else:
+            # Search through the sorter rather than a sorted copy of the whole name table
+            table = self.names[:self.num_nodes]
+            pos = np.clip(np.searchsorted(table, names, sorter=self._order), 0, len(self._order) - 1)
+            found = np.where(table[self._order[pos]] == names, self._order[pos], -1)
+        if self._added:
+            for k in np.flatnonzero(found < 0):
+                found[k] = self._added.get(names[k], -1)
+        return found
+
+    def index_of(self, name:str) -> int:
+        return int(self.indices_of([name.encode()])[0])
+
+    def set_rows(self, coordinate, height, site_width, num_sites, origin) -> None:
+        self.row_coordinate = np.asarray(coordinate, dtype=np.int32)
+        self.row_height = np.asarray(height, dtype=np.int32)
+        self.row_site_width = np.asarray(site_width, dtype=np.int32)
+        self.row_num_sites = np.asarray(num_sites, dtype=np.int32)
+        self.row_origin = np.asarray(origin, dtype=np.int32)
+
+
+def node_arrays(design) -> tuple:
+    """Node data of a `Design` or a `DesignStore` as float64 arrays.
+
+    Returns:
+        tuple: (names, x, y, width, height, fixed), names supports indexing.
+    """
+    if isinstance(design, DesignStore):
+        n = design.num_nodes
+        return (design.node_names, design.x[:n].astype(np.float64), design.y[:n].astype(np.float64),
+                design.width[:n].astype(np.float64), design.height[:n].astype(np.float64),
+                (design.flags[:n] & FLAG_FIXED).astype(bool))
+    nodes = design.nodes
+    n = len(nodes)
+    return ([node.name for node in nodes],
+            np.fromiter((node.x for node in nodes), dtype=np.float64, count=n),
+            np.fromiter((node.y for node in nodes), dtype=np.float64, count=n),
+            np.fromiter((node.width for node in nodes), dtype=np.float64, count=n),
+            np.fromiter((node.height for node in nodes), dtype=np.float64, count=n),
+            np.fromiter((node.fixed for node in nodes), dtype=bool, count=n))
+
+
+def row_arrays(design) -> tuple:
+    """Row data of a `Design` or a `DesignStore` as float64 arrays.
+
+    Returns:
+        tuple: (coordinate, height, site_width, origin, end).
+    """
+    if isinstance(design, DesignStore):
+        c, h, sw, n, o = (a.astype(np.float64) for a in (design.row_coordinate, design.row_height,
+                          design.row_site_width, design.row_num_sites, design.row_origin))
+        return c, h, sw, o, o + n * sw
+    rows = design.rows
+    return (np.array([r.coordinate for r in rows], dtype=np.float64),
+            np.array([r.height for r in rows], dtype=np.float64),
+            np.array([r.site_width for r in rows], dtype=np.float64),
+            np.array([r.subrow_origin for r in rows], dtype=np.float64),
+            np.array([r.end for r in rows], dtype=np.float64))
+
+
+def _chunks(filename:str):
+    """Yield the lines of a file in chunks of about CHUNK_BYTES."""
+    with open(filename, 'rb') as f:
+        while True:
+            lines = f.readlines(CHUNK_BYTES)
+            if not lines:
+                return
+            yield lines
+
+
+def _table(lines:list, skip:tuple, min_cols:int) -> tuple:
+    """Split a chunk of lines into a token table.
+
+    Returns:
+        tuple: (table, rows), table is a 2D bytes array when every data line has the
+        same number of tokens, otherwise None and rows holds the split lines.
+    """
+    rows = [p for p in (line.split() for line in lines)
+            if len(p) >= min_cols and p[0] not in skip and not p[0].startswith(b'#')]
+    if not rows:
+        return None, rows
+    cols = len(rows[0])
+    if any(len(p) != cols for p in rows):
+        return None, rows
+    return np.array(rows, dtype='S'), rows
+
+
+def load_dotnode(filename:str, store:DesignStore) -> DesignStore:
+    """Load the .node file into the store chunk by chunk.
+    """
+    for lines in _chunks(filename):
+        if len(store.width) == 0:
+            for line in lines:
+                parts = line.split()
+                if parts and parts[0] == b'NumNodes':
+                    store._reserve(int(parts[-1]))
+        table, rows = _table(lines, (b'UCLA', b'NumNodes', b'NumTerminals'), 3)
+        if table is not None:
+            fixed = table[:, 3] == b'terminal' if table.shape[1] > 3 else np.zeros(len(table), dtype=bool)
+            store.append_nodes(table[:, 0], table[:, 1].astype(np.float64), table[:, 2].astype(np.float64), fixed)
+        elif rows:
+            store.append_nodes([p[0] for p in rows],
+                               [float(p[1]) for p in rows],
+                               [float(p[2]) for p in rows],
+                               [len(p) > 3 and p[3].startswith(b'terminal') for p in rows])
+    return store
+
+
+def load_dotpl(filename:str, store:DesignStore, xs:np.ndarray = None, ys:np.ndarray = None) -> tuple:
+    """Load the positions of a .pl file, into the store by default.
+
+    Args:
+        filename (str): The path to the .pl file.
+        store (DesignStore): The store holding the name table.
+        xs (np.ndarray, optional): Target array for x. Defaults to the store's.
+        ys (np.ndarray, optional): Target array for y. Defaults to the store's.
+
+    Returns:
+        tuple: The (xs, ys) arrays.
+    """
+    into_store = xs is None
+    xs = store.x if xs is None else xs
+    ys = store.y if ys is None else ys
+    for lines in _chunks(filename):
+        table, rows = _table(lines, (b'UCLA',), 3)
+        if table is not None:
+            names, px, py = table[:, 0], table[:, 1].astype(np.float64), table[:, 2].astype(np.float64)
+            orient = table[:, 4] if table.shape[1] > 4 else np.full(len(table), b'N')
+            fixed = table[:, 5] == b'/FIXED' if table.shape[1] > 5 else np.zeros(len(table), dtype=bool)
+        elif rows:
+            names = [p[0] for p in rows]
+            px = np.array([float(p[1]) for p in rows])
+            py = np.array([float(p[2]) for p in rows])
+            orient = np.array([p[4] if len(p) > 4 else b'N' for p in rows])
+            fixed = np.array([b'/FIXED' in p for p in rows])
+        else:
+            continue
+        idx = store.indices_of(names)
+        known = idx >= 0
+        if not known.all():
+            print(f'Warning: {int((~known).sum())} unknown nodes in {filename}')
+        xs[idx[known]] = px[known]
+        ys[idx[known]] = py[known]
+        if into_store:
+            codes = np.zeros(len(idx), dtype=np.uint8)
+            for code, name in enumerate(ORIENTS):
+                codes[orient == name.encode()] = code
+            store.orient[idx[known]] = codes[known]
+            store.flags[idx[known & fixed]] |= FLAG_FIXED
+    return xs, ys
+
+
+def load_dotscl(filename:str, store:DesignStore) -> DesignStore:
+    """Load the core rows of the .scl file into the store.
+    """
+    cols = {'Coordinate': [], 'Height': [], 'Sitewidth': [], 'NumSites': [], 'SubrowOrigin': []}
+    fields = None
+    with open(filename, 'r') as f:
+        for line in f:
+            parts = line.replace(':', ' ').split()
+            if not parts:
+                continue
+            if parts[0] == 'CoreRow':
+                fields = {'Sitewidth': '1'}
+            elif parts[0] == 'End' and fields is not None:
+                for key in cols:
+                    cols[key].append(int(fields[key]))
+                fields = None
+            elif fields is not None:
+                for key, value in zip(parts[0::2], parts[1::2]):
+                    fields[key] = value
+    store.set_rows(cols['Coordinate'], cols['Height'], cols['Sitewidth'], cols['NumSites'], cols['SubrowOrigin'])
+    return store
+
+
+def read_dotaux(filename:str) -> tuple:
+    """Read the .aux file.
+
+    Args:
+        filename (str): The path to the .aux file.
+
+    Returns:
+        tuple: The files it refers to by extension, and the MaxDisplacement.
+    """
+    dirname = os.path.dirname(filename)
+    files, max_displacement = {}, float('inf')
+    with open(filename, 'r') as f:
+        for line in f:
+            if ':' not in line:
+                continue
+            key, value = line.split(':', 1)
+            if key.strip() == 'MaxDisplacement':
+                max_displacement = float(value)
+            else:
+                for name in value.split():
+                    files[os.path.splitext(name)[1]] = os.path.join(dirname, name)
+    return files, max_displacement
+
+
+def design_files(filename:str) -> list:
+    """The files an .aux file refers to, a loaded design depends on all of them."""
+    return list(read_dotaux(filename)[0].values())
+
+
+def load_design(filename:str) -> DesignStore:
+    """Load the .aux file and the files it refers to into a compact store, the
+    counterpart of `parse_dotaux`.
+
+    Args:
+        filename (str): The path to the .aux file.
+
+    Returns:
+        DesignStore: The loaded design.
+    """
+    store = DesignStore(os.path.splitext(os.path.basename(filename))[0])
+    store.files, store.max_displacement = read_dotaux(filename)
+    load_dotnode(store.files['.node'], store)
+    load_dotpl(store.files['.pl'], store)
+    load_dotscl(store.files['.scl'], store)
+    return store
+
+
+def write_dotpl(filename:str, design, xs, ys) -> None:
+    """Write the placement of a `Design` or a `DesignStore` into a Bookshelf .pl file.
+
+    Args:
+        filename (str): The path of the .pl file.
+        design (Design): The design or DesignStore.
+        xs (array-like): The x coordinates.
+        ys (array-like): The y coordinates.
+    """
+    if isinstance(design, DesignStore):
+        n = design.num_nodes
+        names = design.names[:n]
+        orients = np.array(ORIENTS)[design.orient[:n]]
+        fixed = (design.flags[:n] & FLAG_FIXED).astype(bool)
+    else:
+        names = [node.name for node in design.nodes]
+        orients = [node.orient for node in design.nodes]
+        fixed = [node.fixed for node in design.nodes]
+    write_pl(filename, names, xs, ys, orients, fixed)
+
+
+def _write_synthetic(dirname:str, scl:str, num_cells:int) -> str:
+    """Write a synthetic design with num_cells random cells on the rows of scl."""
+    import random, shutil
+
+    name = 'synthetic'
+    shutil.copy(scl, os.path.join(dirname, f'{name}.scl'))
+    store = load_dotscl(scl, DesignStore())
+    x_lo, x_hi = int(store.row_origin.min()), int((store.row_origin + store.row_num_sites * store.row_site_width).max())
+    y_lo, y_hi = int(store.row_coordinate.min()), int(store.row_coordinate.max())
+    height = int(store.row_height[0])
+    with open(os.path.join(dirname, f'{name}.node'), 'w') as fn, open(os.path.join(dirname, f'{name}.pl'), 'w') as fp:
+        fn.write(f'NumNodes : {num_cells}\nNumTerminals : 0\n\n')
+        fn.write(''.join(f'o{i} {random.randint(1, 16)} {height}\n' for i in range(num_cells)))
+        fp.write('UCLA pl 1.0\n\n')
+        fp.write(''.join(f'o{i} {random.uniform(x_lo, x_hi):.2f} {random.uniform(y_lo, y_hi):.2f} : N\n' for i in range(num_cells)))
+    with open(os.path.join(dirname, f'{name}.aux'), 'w') as f:
+        f.write(f'RowBasedPlacement : {name}.node {name}.pl {name}.scl\n')
+    return os.path.join(dirname, f'{name}.aux')
+
+
+def main():
+    import time
+    import argparse
+    import tempfile
+    import tracemalloc
+
+    parser = argparse.ArgumentParser(description='Memory benchmark of the compact design store')
+    parser.add_argument('aux', nargs='?', default=None, help='The .aux file of the design')
+    parser.add_argument('--synthetic', type=int, default=0, help='Generate a design with this many cells on the adaptec1 rows')
+    parser.add_argument('--objects', action='store_true', help='Also measure the object model of lg_parser')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        aux = args.aux
+        if args.synthetic:
+            scl = os.path.join(os.path.dirname(os.path.abspath(__file__)), '../testcase/adaptec1/adaptec1.scl')
+            aux = _write_synthetic(tmp, scl, args.synthetic)
+
+        loaders = [('DesignStore', load_design)]
+        if args.objects:
+            from lg_parser import parse_dotaux
+            loaders.append(('Design (objects)', parse_dotaux))
+        for label, loader in loaders:
+            start_time = time.time()
+            loader(aux)
+            runtime = time.time() - start_time
+            tracemalloc.start()
+            design = loader(aux)
+            current, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            n = len(design.nodes)
+            print(f'{label}: {n} nodes, load {runtime:.2f}s, '
+                  f'resident {current / n:.1f} B/cell, peak {peak / n:.1f} B/cell')
+            del design
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,55 @@
+'''
+Copyright (c) 2024 by Albresky, All Rights Reserved.
+
+Author: Albresky albre02@outlook.com
+Date: 2026-10-19 13:17:38
+LastEditTime: 2026-10-19 13:23:16
+FilePath: /EDA-assignments/lab2/legalization/src/lg_units.py
+
+Description: The definition of classes for units in Bookshelf row-based placement
+'''
+
+
+class Node:
+    def __init__(self, name:str, width:int, height:int, terminal:bool=False) -> None:
+        self.name = name
+        self.width = width
+        self.height = height
+        self.x = 0.0
+        self.y = 0.0
+        self.orient = 'N'
+        
+        # 标记是否为固定单元 (terminal / FIXED)
+        self.fixed = terminal
+
+class Row:
+    def __init__(self, coordinate:int, height:int, site_width:int, num_sites:int, subrow_origin:int) -> None:
+        self.coordinate = coordinate
+        self.height = height
+        self.site_width = site_width
+        self.num_sites = num_sites
+        self.subrow_origin = subrow_origin
+        
+    @property
+    def end(self) -> int:
+        return self.subrow_origin + self.num_sites * self.site_width
+
+class Design:
+    def __init__(self, name:str='') -> None:
+        self.name = name
+        self.nodes = []
+        self.rows = []
+        self.max_displacement = float('inf')
+        self.node_dict = {}
+        self.node_index = {}
+        
+    def add_node(self, node:Node) -> None:
+        self.node_dict[node.name] = node
+        self.node_index[node.name] = len(self.nodes)
+        self.nodes.append(node)
+    
+    def index_of(self, name:str) -> int:
+        return self.node_index.get(name, -1)
+    
+    def add_row(self, row:Row) -> None:
+        self.rows.append(row)
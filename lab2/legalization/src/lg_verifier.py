@@ -0,0 +1,153 @@
+'''
+Copyright (c) 2024 by Albresky, All Rights Reserved.
+
+Author: Albresky albre02@outlook.com
+Date: 2026-10-19 13:17:38
+LastEditTime: 2026-10-19 14:44:33
+FilePath: /EDA-assignments/lab2/legalization/src/lg_verifier.py
+
+Description: Legality verifier for row-based placements: overlaps, core region,
+             row/site alignment and MaxDisplacement.
+'''
+
+import os, sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '.'))
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '../../floorplan/src'))
+
+import time
+import argparse
+import numpy as np
+from lg_store import load_design, load_dotpl, node_arrays, row_arrays
+from fp_verifier import VerifyResult
+
+
+def _band_overlaps(bottoms, xl, yl, xh, yh, cells, fixed) -> list:
+    """Find all overlapping pairs of rectangles. The y axis is cut into bands, from each
+    bottom to the next one and the last band is unbounded. Every rectangle is binned into
+    each band it crosses, on a row or not, and within a band sorted by x a rectangle can
+    only overlap the ones that start before its right edge. The pairs are then checked
+    along y and reported once.
+
+    Args:
+        bottoms (ndarray): The increasing band bottoms, the first one is -inf.
+        xl, yl, xh, yh (ndarray): The lower-left and upper-right corners.
+        cells (ndarray): Indices of the rectangles, none of them degenerate.
+        fixed (ndarray): Fixed flags, pairs of two fixed rectangles are ignored.
+
+    Returns:
+        list: The overlapping pairs.
+    """
+    if len(cells) < 2:
+        return []
+    first = np.searchsorted(bottoms, yl[cells], side='right') - 1
+    last = np.searchsorted(bottoms, yh[cells], side='left')
+    counts = last - first
+    starts = np.cumsum(counts) - counts
+    ids = np.repeat(cells, counts)
+    level = np.repeat(first, counts) + np.arange(len(ids)) - np.repeat(starts, counts)
+
+    order = np.lexsort((xl[ids], level))
+    ids, level = ids[order], level[order]
+    shift = float(xl[cells].min())
+    span = float(xh[cells].max()) - shift + 1.0
+    key_l = level * span + (xl[ids] - shift)
+    key_h = level * span + (xh[ids] - shift)
+
+    # Rectangle k overlaps along x the ones after it up to the first that starts at its right edge
+    ends = np.searchsorted(key_l, key_h, side='left')
+    hits = np.maximum(ends - np.arange(len(ids)) - 1, 0)
+    a = np.repeat(np.arange(len(ids)), hits)
+    b = a + 1 + np.arange(len(a)) - np.repeat(np.cumsum(hits) - hits, hits)
+    i, j = ids[a], ids[b]
+    real = (np.maximum(yl[i], yl[j]) < np.minimum(yh[i], yh[j])) & ~(fixed[i] & fixed[j])
+    i, j = i[real], j[real]
+    pairs = np.unique(np.minimum(i, j).astype(np.int64) * len(xl) + np.maximum(i, j))
+    return [(int(p // len(xl)), int(p % len(xl))) for p in pairs]
+
+
+def verify_placement(design, xs=None, ys=None) -> VerifyResult:
+    """Verify a row-based placement against the rows of the design.
+
+    Checks that movable nodes do not overlap each other or fixed nodes, stay inside the
+    core region, sit on a row with their left edge on a site and span whole rows, and
+    are not moved by more than MaxDisplacement (Manhattan distance) from the design's
+    initial positions.
+
+    Args:
+        design (Design): The design or DesignStore, node positions are the initial placement.
+        xs (array-like, optional): The x coordinates of the result. Defaults to the design's.
+        ys (array-like, optional): The y coordinates of the result. Defaults to the design's.
+
+    Returns:
+        VerifyResult: The structured result.
+    """
+    start_time = time.time()
+    names, x0, y0, w, h, fixed = node_arrays(design)
+    result = VerifyResult(names)
+    xl = x0 if xs is None else np.asarray(xs, dtype=np.float64)
+    yl = y0 if ys is None else np.asarray(ys, dtype=np.float64)
+    xh, yh = xl + w, yl + h
+    movable = ~fixed & (w > 0) & (h > 0)
+
+    # Rows grouped by level (y coordinate), subrows sorted by origin inside a level
+    r_y, r_h, r_sw, r_org, r_end = row_arrays(design)
+    levels, r_level = np.unique(r_y, return_inverse=True)
+    level_h = np.zeros(len(levels))
+    np.maximum.at(level_h, r_level, r_h)
+
+    # Core region
+    core = (r_org.min(), levels[0], r_end.max(), levels[-1] + level_h[-1])
+    outside = movable & ((xl < core[0]) | (yl < core[1]) | (xh > core[2]) | (yh > core[3]))
+    result.outside = np.flatnonzero(outside).tolist()
+
+    # Row and site alignment
+    lvl = np.clip(np.searchsorted(levels, yl), 0, len(levels) - 1)
+    on_row = levels[lvl] == yl
+    span = float(max(r_end.max(), xh.max()) - min(r_org.min(), xl.min())) + 1.0
+    shift = min(r_org.min(), xl.min())
+    sub_order = np.lexsort((r_org, r_level))
+    sub_key = r_level[sub_order] * span + (r_org[sub_order] - shift)
+    sub = sub_order[np.clip(np.searchsorted(sub_key, lvl * span + (xl - shift), side='right') - 1, 0, len(r_y) - 1)]
+    in_subrow = (r_level[sub] == lvl) & (xl >= r_org[sub]) & (xh <= r_end[sub])
+    on_site = np.isclose(np.mod(xl - r_org[sub], r_sw[sub]), 0) | np.isclose(np.mod(xl - r_org[sub], r_sw[sub]), r_sw[sub])
+    top = np.clip(np.searchsorted(levels, yh - level_h[lvl]), 0, len(levels) - 1)
+    whole_rows = np.isclose(levels[top] + level_h[top], yh)
+    aligned = on_row & in_subrow & on_site & whole_rows
+    result.misaligned = np.flatnonzero(movable & ~aligned & ~outside).tolist()
+
+    # Displacement
+    disp = np.abs(xl - x0) + np.abs(yl - y0)
+    disp[~movable] = 0
+    result.max_displacement = float(disp.max()) if len(disp) else 0.0
+    result.total_displacement = float(disp.sum())
+    result.over_displaced = np.flatnonzero(disp > design.max_displacement).tolist()
+
+    # Overlaps: the rows cut the y axis into bands, cells off their rows and fixed nodes
+    # cross several of them
+    bottoms = np.concatenate([[-np.inf], levels, [levels[-1] + level_h[-1]]])
+    overlaps = _band_overlaps(bottoms, xl, yl, xh, yh, np.flatnonzero((w > 0) & (h > 0)), fixed)
+    result.overlaps = overlaps
+    result.runtime = time.time() - start_time
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Verify a row-based placement')
+    parser.add_argument('aux', help='The .aux file of the design')
+    parser.add_argument('pl', nargs='?', default=None, help='The result .pl file, defaults to the initial placement')
+    args = parser.parse_args()
+
+    design = load_design(args.aux)
+    xs = ys = None
+    if args.pl:
+        n = design.num_nodes
+        xs, ys = load_dotpl(args.pl, design, design.x[:n].astype(np.float64), design.y[:n].astype(np.float64))
+    result = verify_placement(design, xs, ys)
+    print(result.report())
+    print(f'MaxDisplacement={result.max_displacement} TotalDisplacement={result.total_displacement}')
+    sys.exit(0 if result.is_valid else 1)
+
+
+if __name__ == '__main__':
+    main()